@@ -96,11 +96,30 @@ DATABASES = {
         'PORT': config('DB_PORT'),
     }
 }
+# Cross-request cache for resolved sharing permissions (see sharing/permissions.py).
+# Redis is shared by every worker; without it each process keeps its own LocMem copy,
+# which other workers' ACL writes can't invalidate, so entries expire much sooner.
+PERMISSION_CACHE_REDIS_URL = config("PERMISSION_CACHE_REDIS_URL", default="")
+if PERMISSION_CACHE_REDIS_URL:
+    PERMISSION_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': PERMISSION_CACHE_REDIS_URL,
+    }
+    PERMISSION_CACHE_TIMEOUT = 60  # seconds
+else:
+    PERMISSION_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sharing-permissions',
+    }
+    PERMISSION_CACHE_TIMEOUT = 5  # seconds
+PERMISSION_CACHE_ALIAS = 'permissions'
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'dms_cache_table',
-    }
+    },
+    'permissions': PERMISSION_CACHE,
 }
 
 
@@ -161,7 +180,8 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'dms_cache_table',
-    }
+    },
+    'permissions': PERMISSION_CACHE,
 }
 
 AUTH_SECURITY = {
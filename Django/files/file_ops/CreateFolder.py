@@ -64,7 +64,7 @@ from rest_framework import status
 from accounts.authentication import CustomJWEAuthentication
 from ..models import FileObject
 from ..serializers import CreateFolderSerializer
-from sharing.models import FileAccessControl
+from sharing.permissions import can_edit
 
 class CreateFolderAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
@@ -87,14 +87,8 @@ class CreateFolderAPIView(APIView):
                 return Response({"error": "Invalid parent folder UID."}, status=404)
 
             # Access check
-            if parent.owner != user:
-                has_editor_access = FileAccessControl.objects.filter(
-                    file=parent,
-                    user=user,
-                    access_level="editor"
-                ).exists()
-                if not has_editor_access:
-                    return Response({"error": "No permission to create folder here."}, status=403)
+            if not can_edit(user, parent):
+                return Response({"error": "No permission to create folder here."}, status=403)
 
         # ✅ Create folder
         new_folder = FileObject.objects.create(
@@ -105,19 +99,6 @@ class CreateFolderAPIView(APIView):
             parent=parent
         )
 
-        # ✅ Inherit access from parent
-        if parent:
-            parent_access_controls = FileAccessControl.objects.filter(file=parent)
-            access_entries = [
-                FileAccessControl(
-                    file=new_folder,
-                    user=access.user,
-                    access_level=access.access_level
-                )
-                for access in parent_access_controls
-            ]
-            FileAccessControl.objects.bulk_create(access_entries)
-
         return Response({
             "message": "Folder created successfully.",
             "folder": {
@@ -2,14 +2,16 @@ from uuid import UUID
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseRedirect
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject, FileVersion, FileActionLog
-from sharing.models import FileAccessControl
+from sharing.permissions import can_edit
 import requests
 from urllib.parse import quote
 from django.utils import timezone
 FASTAPI_DOWNLOAD_URL = "http://127.0.0.1:8081/download_file"
+FASTAPI_PRESIGNED_DOWNLOAD_URL = "http://127.0.0.1:8081/presigned_download"
+DELIVERY_MODES = ("stream", "redirect", "url")
 
 class DownloadFileAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
@@ -20,24 +22,24 @@ class DownloadFileAPIView(APIView):
         # if file_uid is str:
         #     file_uid = UUID(str(file_uid))
         version_id = request.data.get('version_id')  # Optional
+        # "stream" proxies the bytes; "redirect" (302) and "url" (JSON) hand out a presigned S3 URL
+        delivery = request.data.get('delivery', 'stream')
 
         if not file_uid:
             return Response({"error": "file_uid is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if delivery not in DELIVERY_MODES:
+            return Response({"error": f"delivery must be one of {', '.join(DELIVERY_MODES)}."}, status=status.HTTP_400_BAD_REQUEST)
 
         user = request.user
         file_obj = FileObject.objects.filter(uid=file_uid,trashed_at__isnull=True).first()
         if not file_obj:
             return Response({"error": "File not found or access denied."}, status=status.HTTP_404_NOT_FOUND)
         
-        if file_obj.owner != user:
-            has_editor_access = FileAccessControl.objects.filter(
-                file=file_obj, user=user, access_level='editor'
-            ).exists()
-            if not has_editor_access:
-                return Response(
-                    {"error": "You do not have permission to download this file."},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        if not can_edit(user, file_obj):
+            return Response(
+                {"error": "You do not have permission to download this file."},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
         # Fetch the first version (version_number = 1) for the given file
         # initial_version = FileVersion.objects.filter(file=file_obj, version_number=1).first()
@@ -51,6 +53,9 @@ class DownloadFileAPIView(APIView):
         file_name = quote(file_name)  # URL encode the file name
         version_id = version_id or file_obj.latest_version_id
 
+        if delivery != "stream":
+            return self.presigned_download(request, file_obj, file_name, version_id, delivery)
+
         try:
             fastapi_url = f"{FASTAPI_DOWNLOAD_URL}/{file_name}"
             params = {"version_id": version_id} if version_id else {}
@@ -90,4 +95,34 @@ class DownloadFileAPIView(APIView):
         except requests.exceptions.RequestException as e:
             return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
 
-# api/files/download_file/
\ No newline at end of file
+    def presigned_download(self, request, file_obj, file_name, version_id, delivery):
+        try:
+            params = {"download_name": file_obj.name}
+            if version_id:
+                params["version_id"] = version_id
+            response = requests.get(
+                f"{FASTAPI_PRESIGNED_DOWNLOAD_URL}/{file_name}",
+                params=params,
+                headers={"Authorization": f"Bearer {request.auth}"},
+                timeout=10
+            )
+        except requests.exceptions.RequestException as e:
+            return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+        if response.status_code != 200:
+            return Response({"error": "Failed to generate download URL."}, status=response.status_code)
+
+        presigned = response.json()
+        FileActionLog.objects.create(
+            file=file_obj,
+            action="downloaded",
+            performed_by=request.user,
+            performed_at=timezone.now(),
+            reason="Presigned download URL issued via API"
+        )
+
+        if delivery == "redirect":
+            return HttpResponseRedirect(presigned["url"])
+        return Response(presigned, status=status.HTTP_200_OK)
+
+# api/files/download_file/
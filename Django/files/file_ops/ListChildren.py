@@ -0,0 +1,146 @@
+import base64
+import json
+from collections import defaultdict
+from uuid import UUID
+
+from django.db.models import Exists, OuterRef, Q, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from accounts.authentication import CustomJWEAuthentication
+from files.models import FileObject, StarredFile
+from sharing.permissions import has_access
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_DEPTH = 5
+
+# Same (type, name) order the tree listing uses; uid breaks ties so the keyset is total
+CHILD_ORDERING = ("type", "name", "uid")
+
+
+def encode_cursor(obj):
+    payload = json.dumps([obj.type, obj.name, str(obj.uid)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    file_type, name, uid = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    return file_type, name, UUID(uid)
+
+
+def children_queryset():
+    """Non-trashed items annotated with whether they have non-trashed children."""
+    return FileObject.objects.filter(trashed_at__isnull=True).annotate(
+        has_children=Exists(FileObject.objects.filter(parent=OuterRef("pk"), trashed_at__isnull=True))
+    )
+
+
+def load_children(folder_uids, limit=None):
+    """Children of many folders in one query, at most `limit` + 1 per folder."""
+    queryset = children_queryset().filter(parent_id__in=folder_uids)
+    if limit is not None:
+        queryset = queryset.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F("parent_id")],
+                order_by=[F(field).asc() for field in CHILD_ORDERING],
+            )
+        ).filter(row_number__lte=limit + 1)
+
+    children = defaultdict(list)
+    for child in queryset.order_by("parent_id", *CHILD_ORDERING):
+        children[child.parent_id].append(child)
+    return children
+
+
+def expand_folders(nodes, depth, limit, starred_uids):
+    """Inline up to `depth` levels (all when None) below `nodes`, fetching each level in one query."""
+    level = [node for node in nodes if node["type"] == "folder" and node["has_children"]]
+    while level and (depth is None or depth > 0):
+        children = load_children([UUID(node["uid"]) for node in level], limit)
+        next_level = []
+        for node in level:
+            page = children.get(UUID(node["uid"]), [])
+            node["next_cursor"] = encode_cursor(page[limit - 1]) if limit is not None and len(page) > limit else None
+            node["children"] = [serialize_node(child, starred_uids) for child in page[:limit]]
+            next_level.extend(
+                child for child in node["children"] if child["type"] == "folder" and child["has_children"]
+            )
+        level = next_level
+        if depth is not None:
+            depth -= 1
+
+
+def serialize_node(obj, starred_uids):
+    node = {
+        "uid": str(obj.uid),
+        "name": obj.name,
+        "type": obj.type,
+        "is_starred": obj.uid in starred_uids,
+        "has_children": obj.has_children,
+    }
+    if obj.type == "folder":
+        # Folders always carry the key, empty when not expanded (or empty), as the tree views always have
+        node["children"] = []
+    return node
+
+
+class FolderChildrenAPIView(APIView):
+    authentication_classes = [CustomJWEAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        parent_uid = request.query_params.get("parent_uid")
+        cursor = request.query_params.get("cursor")
+
+        try:
+            limit = min(int(request.query_params.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            depth = min(int(request.query_params.get("depth", 1)), MAX_DEPTH)
+        except ValueError:
+            return Response({"error": "limit and depth must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or depth < 1:
+            return Response({"error": "limit and depth must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = children_queryset()
+        if parent_uid:
+            try:
+                folder = FileObject.objects.get(uid=UUID(parent_uid), type="folder", trashed_at__isnull=True)
+            except (ValueError, FileObject.DoesNotExist):
+                return Response({"error": "Folder not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            if not has_access(user, folder):
+                return Response({"error": "You do not have access to this folder."}, status=status.HTTP_403_FORBIDDEN)
+            queryset = queryset.filter(parent=folder)
+        else:
+            queryset = queryset.filter(owner=user, parent__isnull=True)
+
+        # Keyset pagination over the (parent, type, name) index
+        if cursor:
+            try:
+                after_type, after_name, after_uid = decode_cursor(cursor)
+            except (ValueError, TypeError):
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(
+                Q(type__gt=after_type) |
+                Q(type=after_type, name__gt=after_name) |
+                Q(type=after_type, name=after_name, uid__gt=after_uid)
+            )
+
+        page = list(queryset.order_by(*CHILD_ORDERING)[:limit + 1])
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        page = page[:limit]
+
+        starred_uids = set(StarredFile.objects.filter(user=user).values_list("file_id", flat=True))
+        items = [serialize_node(obj, starred_uids) for obj in page]
+        expand_folders(items, depth - 1, limit, starred_uids)
+
+        return Response({
+            "parent_uid": parent_uid,
+            "items": items,
+            "next_cursor": next_cursor,
+        }, status=status.HTTP_200_OK)
@@ -31,51 +31,71 @@
 
 #         return node
 
+from collections import defaultdict
+from django.db import connection
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject, StarredFile
 
+# Whole non-trashed tree under the user's root items in one round trip
+FILE_TREE_SQL = f"""
+    WITH RECURSIVE tree AS (
+        SELECT uid, parent_id, name, type
+        FROM {FileObject._meta.db_table}
+        WHERE owner_id = %s AND parent_id IS NULL AND trashed_at IS NULL
+        UNION ALL
+        SELECT child.uid, child.parent_id, child.name, child.type
+        FROM {FileObject._meta.db_table} child
+        JOIN tree ON child.parent_id = tree.uid
+        WHERE child.trashed_at IS NULL
+    )
+    SELECT uid, parent_id, name, type FROM tree ORDER BY type, name
+"""
+
 class ListUserFilesAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
-        root_files = FileObject.objects.filter(
-            owner=user, parent=None, trashed_at__isnull=True
-        ).order_by('type', 'name')
+
+        with connection.cursor() as cursor:
+            cursor.execute(FILE_TREE_SQL, [user.pk])
+            rows = cursor.fetchall()
+
+        # Rows arrive sorted by (type, name), so each parent's list keeps that order
+        children_by_parent = defaultdict(list)
+        for uid, parent_id, name, file_type in rows:
+            children_by_parent[parent_id].append((uid, name, file_type))
 
         starred_uids = set(
             str(uid) for uid in StarredFile.objects.filter(user=user).values_list('file__uid', flat=True)
         )
 
-        data = [self.build_file_tree(obj, starred_uids) for obj in root_files]
+        data = [
+            self.build_file_tree(item, [], children_by_parent, starred_uids)
+            for item in children_by_parent[None]
+        ]
         return Response(data)
 
-    def build_file_tree(self, file_obj, starred_uids):
-        path_list = self.get_path_list(file_obj)
+    def build_file_tree(self, item, parent_path, children_by_parent, starred_uids):
+        uid, name, file_type = item
+        path_list = parent_path + [name]
         node = {
-            "uid": str(file_obj.uid),
-            "name": file_obj.name,
-            "type": file_obj.type,
-            "is_starred": str(file_obj.uid) in starred_uids,
+            "uid": str(uid),
+            "name": name,
+            "type": file_type,
+            "is_starred": str(uid) in starred_uids,
             "breadcrumbs": path_list,                      # List of folder/file names from root
             "path": "/" + "/".join(path_list)              # String path from root
         }
 
-        if file_obj.type == "folder":
-            children = FileObject.objects.filter(parent=file_obj, trashed_at__isnull=True).order_by('type', 'name')
-            node["children"] = [self.build_file_tree(child, starred_uids) for child in children]
+        if file_type == "folder":
+            node["children"] = [
+                self.build_file_tree(child, path_list, children_by_parent, starred_uids)
+                for child in children_by_parent[uid]
+            ]
 
         return node
-
-    def get_path_list(self, file_obj):
-        path = []
-        current = file_obj
-        while current:
-            path.insert(0, current.name)
-            current = current.parent
-        return path
-
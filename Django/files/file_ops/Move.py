@@ -5,7 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from files.models import FileObject
 from accounts.authentication import CustomJWEAuthentication
-from sharing.models import FileAccessControl
+from sharing.permissions import can_edit
 
 class MoveFileOrFolderAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
@@ -25,7 +25,7 @@ class MoveFileOrFolderAPIView(APIView):
         except FileObject.DoesNotExist:
             return Response({"error": "File/folder not found or is trashed."}, status=status.HTTP_404_NOT_FOUND)
 
-        if not has_editor_access(user, source):
+        if not can_edit(user, source):
             return Response({"error": "You do not have permission to move this file/folder."}, status=status.HTTP_403_FORBIDDEN)
 
         # Prevent self move
@@ -40,7 +40,7 @@ class MoveFileOrFolderAPIView(APIView):
             except FileObject.DoesNotExist:
                 return Response({"error": "Target folder not found or is trashed."}, status=status.HTTP_404_NOT_FOUND)
 
-            if not has_editor_access(user, target_folder):
+            if not can_edit(user, target_folder):
                 return Response({"error": "You do not have permission to move files into this folder."}, status=status.HTTP_403_FORBIDDEN)
 
         # No-op move
@@ -49,7 +49,7 @@ class MoveFileOrFolderAPIView(APIView):
 
         # Prevent move into descendant
         if source.type == "folder" and target_folder:
-            if is_descendant(target_folder, source):
+            if target_folder.uid == source.uid or is_descendant(target_folder, source):
                 return Response({"error": "Cannot move a folder into its own subfolder."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Name conflict check
@@ -69,44 +69,11 @@ class MoveFileOrFolderAPIView(APIView):
         source.parent = target_folder
         source.save(update_fields=["parent", "modified_at"])
 
-        # Inherit editor access from target folder
-        if target_folder:
-            editors = FileAccessControl.objects.filter(
-                file=target_folder,
-                access_level="editor"
-            ).exclude(user=source.owner)  # Avoid adding owner redundantly
-
-            for editor in editors:
-                FileAccessControl.objects.get_or_create(
-                    file=source,
-                    user=editor.user,
-                    defaults={"access_level": "editor"}
-                )
-
-            if target_folder.owner != source.owner:
-                FileAccessControl.objects.get_or_create(
-                    file=source,
-                    user=target_folder.owner,
-                    defaults={"access_level": "editor"}  # or "viewer", based on your logic
-                )
-
         return Response({"message": "Moved successfully."}, status=status.HTTP_200_OK)
 
 
-def has_editor_access(user, file_obj):
-    return (
-        file_obj.owner == user or
-        FileAccessControl.objects.filter(file=file_obj, user=user, access_level="editor").exists()
-    )
-
-
 def is_descendant(child_candidate, ancestor):
     """
     Check if `child_candidate` is a descendant of `ancestor`
     """
-    current = child_candidate.parent
-    while current:
-        if current.uid == ancestor.uid:
-            return True
-        current = current.parent
-    return False
+    return child_candidate.is_descendant_of(ancestor)
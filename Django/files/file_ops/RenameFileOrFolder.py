@@ -5,7 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject, FileVersion
-from sharing.models import FileAccessControl
+from sharing.permissions import can_edit
 
 class RenameFileOrFolderAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
@@ -26,7 +26,7 @@ class RenameFileOrFolderAPIView(APIView):
         user = request.user
 
         # Access control check: owner or editor
-        if not (obj.owner == user or FileAccessControl.objects.filter(file=obj, user=user, access_level="editor").exists()):
+        if not can_edit(user, obj):
             return Response({"error": "You do not have permission to rename this file/folder."}, status=403)
 
         # Duplicate name check in same parent/type
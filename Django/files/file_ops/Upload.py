@@ -339,12 +339,66 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from django.utils.text import slugify
+from uuid import uuid4
 
-from files.models import FileObject, FileVersion
-from sharing.models import FileAccessControl
+from files.models import FileObject, FileVersion, MetadataExtractionJob
+from sharing.permissions import can_edit
 from accounts.authentication import CustomJWEAuthentication
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+BULK_BATCH_SIZE = 1000
+
+FASTAPI_UPLOAD_URL = "http://127.0.0.1:8081/upload"
+FASTAPI_DELETE_VERSIONS_URL = "http://127.0.0.1:8081/delete_file_versions"
+UPLOAD_FORWARD_WORKERS = 8
+
+# Shared by all requests: keeps connections to FastAPI alive instead of a new client per file
+fastapi_client = httpx.Client(
+    timeout=60.0,
+    limits=httpx.Limits(max_connections=UPLOAD_FORWARD_WORKERS, max_keepalive_connections=UPLOAD_FORWARD_WORKERS),
+)
+
+# Bounds how many uploads are in flight to FastAPI at once across the process
+upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_FORWARD_WORKERS, thread_name_prefix="upload-forward")
+
+
+def forward_upload(file, headers, params=None):
+    """
+    POST one file to FastAPI. The file object is handed to httpx as-is, so the
+    multipart body is streamed from Django's upload spool rather than read into memory.
+    """
+    file.seek(0)
+    response = fastapi_client.post(
+        FASTAPI_UPLOAD_URL,
+        files=[("files", (file.name, file, file.content_type))],
+        headers=headers,
+        params=params,
+    )
+    if response.status_code != 200:
+        raise Exception(f"FastAPI upload failed: {response.text}")
+    return response.json()
+
+
+def discard_uploads(upload_data_lists, headers):
+    """
+    Delete object versions that reached S3 for a batch that was not recorded,
+    so a failed request leaves no orphaned versions behind. Best effort.
+    """
+    payload = [
+        {"filename": upload_data["filename"], "version_id": upload_data["version_id"]}
+        for upload_data_list in upload_data_lists
+        for upload_data in upload_data_list
+        if upload_data.get("filename") and upload_data.get("version_id")
+    ]
+    if not payload:
+        return
+    try:
+        fastapi_client.post(FASTAPI_DELETE_VERSIONS_URL, json=payload, headers=headers, timeout=120.0)
+    except httpx.HTTPError:
+        pass
 
 class MultiFileUploadAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
@@ -369,200 +423,261 @@ class MultiFileUploadAPIView(APIView):
         if root_folder_uid:
             try:
                 root = FileObject.objects.get(uid=root_folder_uid, type="folder")
-                if root.owner != user:
-                    # Must have editor access
-                    if not FileAccessControl.objects.filter(file=root, user=user, access_level="editor").exists():
-                        return Response({"error": "You don't have editor access to this folder."}, status=status.HTTP_403_FORBIDDEN)
+                # Must be the owner or have editor access
+                if not can_edit(user, root):
+                    return Response({"error": "You don't have editor access to this folder."}, status=status.HTTP_403_FORBIDDEN)
             except FileObject.DoesNotExist:
                 return Response({"error": "Invalid root folder UID."}, status=status.HTTP_404_NOT_FOUND)
 
-        uploaded_files = []
-
+        owner = root.owner if root else user
+
+        # Split every relative path once: folder components + file name
+        entries = []
+        for file, rel_path in zip(files_data, relative_paths):
+            cleaned_path = os.path.normpath(rel_path).replace("\\", "/")
+            parts = cleaned_path.split("/")
+            entries.append((file, cleaned_path, tuple(part.strip() for part in parts[:-1])))
+
+        access_token = request.auth
+        headers = {
+            "Authorization": f"Bearer {access_token}"
+        }
+
+        # Refuse overwrites up front, before any bytes are sent to S3
+        denied = self.find_denied_overwrites(user, owner, root, entries)
+        if denied:
+            return Response(
+                {"error": f"You don't have editor access to overwrite {', '.join(sorted(denied))}."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        responses = []
         try:
+            # Forward every file before touching the DB, so no locks are held during transfers
+            # and a failed upload leaves no rows behind
+            futures = [upload_executor.submit(forward_upload, file, headers, {"user_id": str(user.pk)}) for file, _, _ in entries]
+            try:
+                responses = [future.result() for future in futures]
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                # Let in-flight forwards finish and keep what landed, so it can be deleted below
+                responses = [
+                    future.result() for future in futures
+                    if not future.cancelled() and future.exception() is None
+                ]
+                raise
+
             with transaction.atomic():
-                for file, rel_path in zip(files_data, relative_paths):
-                    cleaned_path = os.path.normpath(rel_path).replace("\\", "/")
-                    parts = cleaned_path.split("/")
-
-                    parent = root
-                    for folder_name in parts[:-1]:  # all except the file
-                        folder_name = folder_name.strip()
-                        folder, created = FileObject.objects.get_or_create(
-                            owner=root.owner if root else user,
-                            parent=parent,
-                            name=folder_name,
-                            type="folder",
-                            defaults={
-                                "extension": "",
-                                "size": 0,
-                                "uploaded_url": None,
-                                "metadata": {},
-                            }
-                        )
-                        parent = folder
-                        if created:
-                            # Apply inherited access from parent
-                            self.apply_inherited_access(folder, user)
-                            # Ensure owner gets access if editor is uploading
-                            if root and user != root.owner:
-                                self.ensure_owner_access(folder, root.owner)
-
-                    file.seek(0)
-                    fastapi_files = [("files", (file.name, file.read(), file.content_type))]
-
-                    access_token = request.auth
-                    headers = {
-                        "Authorization": f"Bearer {access_token}"
-                    }
-
-                    # auth_header = request.META.get("HTTP_AUTHORIZATION")
-                    # if not auth_header:
-                    #     return Response({"error": "Authorization header missing"}, status=401)
-
-                    # headers = {"Authorization": auth_header}
-
-                    with httpx.Client() as client:
-                        fastapi_response = client.post(
-                            "http://127.0.0.1:8081/upload",
-                            files=fastapi_files,
-                            headers=headers,
-                            timeout=60.0,
-                        )
-
-                    if fastapi_response.status_code != 200:
-                        raise Exception(f"FastAPI upload failed: {fastapi_response.text}")
-
-                    upload_data_list = fastapi_response.json()
+                folders = self.materialize_folders(owner, root, {folder_path for _, _, folder_path in entries})
 
+                uploads = []
+                for (file, cleaned_path, folder_path), upload_data_list in zip(entries, responses):
                     for upload_data in upload_data_list:
-                        cdn_url = upload_data["cdn_url"]
-                        version_id = upload_data.get("version_id")
-                        metadata = {
-                            key: upload_data[key]
-                            for key in upload_data
-                            if key not in {"cdn_url", "version_id", "status", "message"}
-                        }
-
-                        existing_file = FileObject.objects.filter(
-                        owner=root.owner if root else user,
-                        parent=parent,
-                        name=upload_data.get("filename", file.name),
-                        type="file"
-                    ).first()
-
-                    if existing_file:
-                        if existing_file.owner != user:
-                            has_editor_access = FileAccessControl.objects.filter(
-                                file=existing_file,
-                                user=user,
-                                access_level="editor"
-                            ).exists()
-                            if not has_editor_access:
-                                raise Exception(f"You don't have editor access to overwrite {existing_file.name}.")
-
-                        existing_file.extension = upload_data.get("extension", "").lstrip(".")
-                        existing_file.size = upload_data.get("size", file.size)
-                        existing_file.uploaded_url = cdn_url
-                        existing_file.latest_version_id = version_id
-                        existing_file.metadata = metadata
-                        existing_file.save()
-
-                        latest_version = FileVersion.objects.filter(file=existing_file).order_by('-version_number').first()
-                        new_version_number = latest_version.version_number + 1 if latest_version else 2
-                        initial_filename = latest_version.initial_filename_snapshot or existing_file.name
-
-                        FileVersion.objects.create(
-                            file=existing_file,
-                            version_number=new_version_number,
-                            action="upload",
-                            metadata_snapshot=metadata,
-                            s3_version_id=version_id,
-                            created_by=user,
-                            initial_filename_snapshot=initial_filename,
-                        )
-
-                        uploaded_files.append({
-                            "uid": str(existing_file.uid),
-                            "name": existing_file.name,
-                            "cdn_url": existing_file.uploaded_url,
-                            "version_id": version_id,
-                            "path": cleaned_path,
-                        })
-
-                    else:
-                        # Create new file
-                        file_obj = FileObject.objects.create(
-                            owner=root.owner if root else user,
-                            parent=parent,
-                            name=upload_data.get("filename", file.name),
-                            type="file",
-                            extension=upload_data.get("extension", "").lstrip("."),
-                            size=upload_data.get("size", file.size),
-                            uploaded_url=cdn_url,
-                            latest_version_id=version_id,
-                            metadata=metadata,
-                        )
-
-                        version_number = FileVersion.objects.filter(file=file_obj).count() + 1
-                        FileVersion.objects.create(
-                            file=file_obj,
-                            version_number=version_number,
-                            action="upload",
-                            metadata_snapshot=metadata,
-                            s3_version_id=version_id,
-                            created_by=user,
-                            initial_filename_snapshot=upload_data.get("filename", file.name), 
-                        )
-
-                        self.apply_inherited_access(file_obj, user)
-                        if root and user != root.owner:
-                            self.ensure_owner_access(file_obj, root.owner)
-
-                        uploaded_files.append({
-                            "uid": str(file_obj.uid),
-                            "name": file_obj.name,
-                            "cdn_url": file_obj.uploaded_url,
-                            "version_id": version_id,
-                            "path": cleaned_path,
-                        })
+                        uploads.append((file, cleaned_path, folders[folder_path], upload_data))
+
+                uploaded_files = self.record_uploads(user, owner, uploads)
 
         except Exception as e:
+            discard_uploads(responses, headers)
             return Response({"error": f"Upload failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response({"uploaded_files": uploaded_files}, status=status.HTTP_201_CREATED)
 
-    def apply_inherited_access(self, file_obj, uploader_user):
+    def find_denied_overwrites(self, user, owner, root, entries):
         """
-        Apply inherited access from parent folders, excluding uploader and already-existing ACLs.
+        Names of existing files this batch would overwrite without editor access.
+        Only folders that already exist are looked up; nothing is created.
         """
-        parent = file_obj.parent
-        visited_users = set()
-
-        while parent:
-            inherited_acls = FileAccessControl.objects.filter(file=parent, inherited=False)
-            for acl in inherited_acls:
-                if acl.user == uploader_user or acl.user_id in visited_users:
+        folders = self.materialize_folders(owner, root, {folder_path for _, _, folder_path in entries}, create=False)
+        targets = [(folders[folder_path], file.name) for file, _, folder_path in entries if folder_path in folders]
+        if not targets:
+            return set()
+
+        parent_filter = Q(parent_id__in={parent.uid for parent, _ in targets if parent})
+        if any(parent is None for parent, _ in targets):
+            parent_filter |= Q(parent__isnull=True)
+
+        wanted = {(parent.uid if parent else None, name) for parent, name in targets}
+        existing = {}
+        for existing_file in FileObject.objects.filter(
+            parent_filter, owner=owner, type="file", name__in={name for _, name in targets}
+        ).order_by("created_at"):
+            existing.setdefault((existing_file.parent_id, existing_file.name), existing_file)
+
+        return {
+            existing_file.name for key, existing_file in existing.items()
+            if key in wanted and not can_edit(user, existing_file)
+        }
+
+    def materialize_folders(self, owner, root, folder_paths, create=True):
+        """
+        Resolve every folder path to a FileObject, creating missing folders level by level.
+        Each level costs one lookup query and at most one bulk insert. With create=False
+        missing folders (and everything below them) are simply left out of the result.
+        """
+        folders = {(): root}
+        all_prefixes = {path[:depth] for path in folder_paths for depth in range(1, len(path) + 1)}
+        max_depth = max((len(path) for path in all_prefixes), default=0)
+
+        for depth in range(1, max_depth + 1):
+            level = [path for path in all_prefixes if len(path) == depth and path[:-1] in folders]
+            if not level:
+                break
+            parent_uids = {folders[path[:-1]].uid for path in level if folders[path[:-1]]}
+            parent_filter = Q(parent_id__in=parent_uids)
+            if any(folders[path[:-1]] is None for path in level):
+                parent_filter |= Q(parent__isnull=True)
+
+            existing = {}
+            for folder in FileObject.objects.filter(
+                parent_filter, owner=owner, type="folder", name__in={path[-1] for path in level}
+            ).order_by("created_at"):
+                existing.setdefault((folder.parent_id, folder.name), folder)
+
+            new_folders = []
+            for path in level:
+                parent = folders[path[:-1]]
+                folder = existing.get((parent.uid if parent else None, path[-1]))
+                if folder is None and not create:
                     continue
-                if not FileAccessControl.objects.filter(file=file_obj, user=acl.user).exists():
-                    FileAccessControl.objects.create(
-                        file=file_obj,
-                        user=acl.user,
-                        access_level=acl.access_level,
-                        inherited=True,
-                        inherited_from=parent
+                if folder is None:
+                    folder_uid = uuid4()
+                    folder = FileObject(
+                        uid=folder_uid,
+                        owner=owner,
+                        parent=parent,
+                        name=path[-1],
+                        type="folder",
+                        extension="",
+                        size=0,
+                        uploaded_url=None,
+                        metadata={},
+                        # bulk_create skips save(), so the materialized path is set here
+                        path=f"{parent.path if parent else '/'}{folder_uid}/",
                     )
-                    visited_users.add(acl.user_id)
-            parent = parent.parent
+                    new_folders.append(folder)
+                folders[path] = folder
+            FileObject.objects.bulk_create(new_folders, batch_size=BULK_BATCH_SIZE)
+
+        return folders
 
-    def ensure_owner_access(self, file_obj, owner_user):
+    def record_uploads(self, user, owner, uploads):
         """
-        Ensures the owner of the shared folder gets 'editor' access to uploaded content by an editor.
+        Write FileObject/FileVersion rows for uploaded files in bulk: one IN query for
+        existing files, one query for their latest versions, then bulk inserts/updates.
         """
-        if not FileAccessControl.objects.filter(file=file_obj, user=owner_user).exists():
-            FileAccessControl.objects.create(
+        parent_uids = {parent.uid for _, _, parent, _ in uploads if parent}
+        parent_filter = Q(parent_id__in=parent_uids)
+        if any(parent is None for _, _, parent, _ in uploads):
+            parent_filter |= Q(parent__isnull=True)
+
+        files_by_key = {}
+        for existing_file in FileObject.objects.filter(
+            parent_filter, owner=owner, type="file",
+            name__in={upload_data.get("filename", file.name) for file, _, _, upload_data in uploads}
+        ).order_by("created_at"):
+            files_by_key.setdefault((existing_file.parent_id, existing_file.name), existing_file)
+
+        latest_versions = {
+            version.file_id: version
+            for version in FileVersion.objects.filter(
+                file_id__in=[f.uid for f in files_by_key.values()]
+            ).order_by("file_id", "-version_number").distinct("file_id")
+        }
+        next_version = {
+            uid: version.version_number + 1 for uid, version in latest_versions.items()
+        }
+        initial_filenames = {
+            uid: version.initial_filename_snapshot for uid, version in latest_versions.items()
+        }
+
+        # Extraction may already have finished while the batch was still forwarding;
+        # fold those results in now rather than waiting for the worker's next pass
+        extracted_by_version = dict(
+            MetadataExtractionJob.objects.filter(
+                version_id__in=[upload_data.get("version_id") for _, _, _, upload_data in uploads if upload_data.get("version_id")],
+                metadata__isnull=False,
+            ).values_list("version_id", "metadata")
+        )
+
+        now = timezone.now()
+        new_files, updated_files, versions, uploaded_files = [], {}, [], []
+        for file, cleaned_path, parent, upload_data in uploads:
+            cdn_url = upload_data["cdn_url"]
+            version_id = upload_data.get("version_id")
+            name = upload_data.get("filename", file.name)
+            metadata = {
+                key: upload_data[key]
+                for key in upload_data
+                if key not in {"cdn_url", "version_id", "status", "message"}
+            }
+            if version_id in extracted_by_version:
+                metadata = {**extracted_by_version[version_id], **metadata, "metadata_status": "ready"}
+
+            key = (parent.uid if parent else None, name)
+            file_obj = files_by_key.get(key)
+            if file_obj is None:
+                # Create new file
+                file_uid = uuid4()
+                file_obj = FileObject(
+                    uid=file_uid,
+                    owner=owner,
+                    parent=parent,
+                    name=name,
+                    type="file",
+                    path=f"{parent.path if parent else '/'}{file_uid}/",
+                )
+                new_files.append(file_obj)
+                files_by_key[key] = file_obj
+                version_number = 1
+                initial_filename = name
+            else:
+                if file_obj.uid not in updated_files and not file_obj._state.adding:
+                    if not can_edit(user, file_obj):
+                        raise Exception(f"You don't have editor access to overwrite {file_obj.name}.")
+                    updated_files[file_obj.uid] = file_obj
+                version_number = next_version.get(file_obj.uid, 2)
+                initial_filename = initial_filenames.get(file_obj.uid) or file_obj.name
+
+            file_obj.extension = upload_data.get("extension", "").lstrip(".")
+            file_obj.size = upload_data.get("size", file.size)
+            file_obj.uploaded_url = cdn_url
+            file_obj.latest_version_id = version_id
+            file_obj.metadata = metadata
+            file_obj.modified_at = now
+            file_obj.accessed_at = now
+
+            next_version[file_obj.uid] = version_number + 1
+            initial_filenames.setdefault(file_obj.uid, initial_filename)
+            versions.append(FileVersion(
                 file=file_obj,
-                user=owner_user,
-                access_level="editor",
-                inherited=True,
-                inherited_from=file_obj.parent
-            )
\ No newline at end of file
+                version_number=version_number,
+                action="upload",
+                metadata_snapshot=metadata,
+                s3_version_id=version_id,
+                created_by=user,
+                initial_filename_snapshot=initial_filename,
+            ))
+
+            uploaded_files.append({
+                "uid": str(file_obj.uid),
+                "name": file_obj.name,
+                "cdn_url": cdn_url,
+                "version_id": version_id,
+                "path": cleaned_path,
+            })
+
+        FileObject.objects.bulk_create(new_files, batch_size=BULK_BATCH_SIZE)
+        FileObject.objects.bulk_update(
+            list(updated_files.values()),
+            ["extension", "size", "uploaded_url", "latest_version_id", "metadata", "modified_at", "accessed_at"],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        FileVersion.objects.bulk_create(versions, batch_size=BULK_BATCH_SIZE)
+        if extracted_by_version:
+            MetadataExtractionJob.objects.filter(version_id__in=list(extracted_by_version)).update(
+                status="done", last_error="", updated_at=now
+            )
+
+        return uploaded_files
@@ -3,8 +3,9 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from accounts.authentication import CustomJWEAuthentication
 
+from django.db.models import Exists, OuterRef
 from files.models import FileObject, StarredFile
-from django.shortcuts import get_object_or_404
+from files.file_ops.ListChildren import expand_folders, MAX_DEPTH
 
 
 class FavoritesListAPIView(APIView):
@@ -12,13 +13,38 @@ class FavoritesListAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        starred_files = StarredFile.objects.filter(user=request.user).select_related('file')
+        # Optional ?depth=N limits how many levels below each starred folder are inlined
+        depth = request.query_params.get("depth")
+        if depth is not None:
+            try:
+                depth = min(int(depth), MAX_DEPTH)
+            except ValueError:
+                return Response({"error": "depth must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+            if depth < 0:
+                return Response({"error": "depth must not be negative."}, status=status.HTTP_400_BAD_REQUEST)
+
+        starred_files = StarredFile.objects.filter(user=request.user).select_related('file').annotate(
+            file_has_children=Exists(FileObject.objects.filter(parent=OuterRef("file"), trashed_at__isnull=True))
+        )
+        starred_uids = {entry.file_id for entry in starred_files}
         response_data = []
+        folder_nodes = []
 
         for entry in starred_files:
             file_obj = entry.file
             if file_obj.type == 'folder':
-                response_data.append(self.build_file_tree(file_obj))
+                node = {
+                    "uid": str(file_obj.uid),
+                    "name": file_obj.name,
+                    "type": file_obj.type,
+                    # "uploaded_url": file_obj.uploaded_url,
+                    # "size": file_obj.size,
+                    # "modified_at": file_obj.modified_at,
+                    "has_children": entry.file_has_children,
+                    "children": []
+                }
+                folder_nodes.append(node)
+                response_data.append(node)
             else:
                 response_data.append({
                     "uid": str(file_obj.uid),
@@ -33,31 +59,7 @@ class FavoritesListAPIView(APIView):
         if not response_data:
             return Response({"message": "No favorites."}, status=status.HTTP_200_OK)
 
-        return Response(response_data, status=status.HTTP_200_OK)
-
-    def build_file_tree(self, file_obj):
-        node = {
-            "uid": str(file_obj.uid),
-            "name": file_obj.name,
-            "type": file_obj.type,
-            # "uploaded_url": file_obj.uploaded_url,
-            # "size": file_obj.size,
-            # "modified_at": file_obj.modified_at,
-            "children": []
-        }
-
-        children = FileObject.objects.filter(parent=file_obj, trashed_at__isnull=True).order_by('type', 'name')
-        for child in children:
-            if child.type == 'folder':
-                node['children'].append(self.build_file_tree(child))
-            else:
-                node['children'].append({
-                    "uid": str(child.uid),
-                    "name": child.name,
-                    "type": child.type,
-                    # "uploaded_url": child.uploaded_url,
-                    # "size": child.size,
-                    # "modified_at": child.modified_at,
-                })
+        # Expand starred folders level by level: one query per level instead of one per folder
+        expand_folders(folder_nodes, depth, None, starred_uids)
 
-        return node
+        return Response(response_data, status=status.HTTP_200_OK)
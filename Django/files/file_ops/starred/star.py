@@ -4,7 +4,7 @@ from rest_framework import status, permissions
 from accounts.authentication import CustomJWEAuthentication
 
 from files.models import FileObject, StarredFile
-from sharing.models import FileAccessControl
+from sharing.permissions import has_access
 from django.shortcuts import get_object_or_404
 
 class ToggleStarAPIView(APIView):
@@ -21,7 +21,7 @@ class ToggleStarAPIView(APIView):
         user = request.user
 
         # ✅ Check access: owner or has access control entry
-        if file.owner != user and not FileAccessControl.objects.filter(file=file, user=user).exists():
+        if not has_access(user, file):
             return Response({"error": "You do not have permission to star this file or folder."},
                             status=status.HTTP_403_FORBIDDEN)
 
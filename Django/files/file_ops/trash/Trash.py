@@ -4,14 +4,19 @@ from rest_framework import status, permissions
 from django.utils import timezone
 from django.db import transaction
 from uuid import UUID
+from collections import defaultdict
+import json
 import requests
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject, FileVersion, TrashAutoCleanQueue, FileActionLog
-from sharing.models import FileAccessControl
+from sharing.permissions import can_edit
 
 
 FASTAPI_TRASH_URL = "http://127.0.0.1:8081/trash_files_bulk"
-FASTAPI_DELETE_FILE_URL = "http://127.0.0.1:8081/delete_file"
+FASTAPI_DELETE_VERSIONS_URL = "http://127.0.0.1:8081/delete_file_versions"
+
+# Trash results are written in batches of this many files as the stream arrives
+TRASH_BATCH_SIZE = 500
 
 
 class TrashFileAPIView(APIView):
@@ -36,12 +41,8 @@ class TrashFileAPIView(APIView):
         user = request.user
 
         # Permission check: owner or editor can trash
-        if file_obj.owner != user:
-            has_editor_access = FileAccessControl.objects.filter(
-                file=file_obj, user=user, access_level="editor"
-            ).exists()
-            if not has_editor_access:
-                return Response({"error": "No permission to trash this file or folder."}, status=status.HTTP_403_FORBIDDEN)
+        if not can_edit(user, file_obj):
+            return Response({"error": "No permission to trash this file or folder."}, status=status.HTTP_403_FORBIDDEN)
 
         # Gather all files to trash (including descendants if folder)
         if file_obj.type == "folder":
@@ -55,8 +56,13 @@ class TrashFileAPIView(APIView):
         trash_payload = []
         older_versions_payload = []
 
+        # One query for the versions of every file being trashed
+        versions_by_file = defaultdict(list)
+        for version in FileVersion.objects.filter(file__in=files_to_trash).order_by('version_number'):
+            versions_by_file[version.file_id].append(version)
+
         for fobj in files_to_trash:
-            versions = list(FileVersion.objects.filter(file=fobj).order_by('version_number'))
+            versions = versions_by_file.get(fobj.uid)
             if not versions:
                 continue
             latest_version = versions[-1]
@@ -84,62 +90,57 @@ class TrashFileAPIView(APIView):
             return Response({"error": "No eligible file versions found to trash."}, status=status.HTTP_400_BAD_REQUEST)
 
         headers = {"Authorization": f"Bearer {request.auth}"}
+        files_by_uid = {str(fobj.uid): fobj for fobj in files_to_trash}
+        trashed_count = 0
 
         # Step 1: Trash (Move latest versions to Glacier)
+        # FastAPI streams one NDJSON line per file as it finishes; results are written in
+        # batches as they arrive, so the read timeout only bounds the gap between lines.
         try:
-            resp = requests.post(FASTAPI_TRASH_URL, json={"files": trash_payload}, headers=headers, timeout=120)
+            resp = requests.post(FASTAPI_TRASH_URL, json={"files": trash_payload}, headers=headers, stream=True, timeout=(10, 120))
             if resp.status_code != 200:
                 return Response({"error": f"FastAPI trash error: {resp.text}"}, status=resp.status_code)
-            trash_results = resp.json()  # List of dicts with file_uid and new_version_id
-        except requests.RequestException as e:
-            return Response({"error": f"FastAPI trash request failed: {str(e)}"}, status=status.HTTP_502_BAD_GATEWAY)
 
-        with transaction.atomic():
-            # Update latest versions and FileObjects
-            for result in trash_results:
-                uid = result.get("file_uid")
-                new_version_id = result.get("new_version_id")
-                if not uid or not new_version_id:
+            batch = []
+            for line in resp.iter_lines():
+                if not line:
                     continue
-                # Update latest version and FileObject latest_version_id and trashed_at
-                try:
-                    latest_version = FileVersion.objects.filter(file__uid=uid).order_by("-version_number").first()
-                    latest_version.s3_version_id = new_version_id
-                    latest_version.storage_class = "GLACIER"
-                    latest_version.restore_status = "available"
-                    latest_version.save()
-
-                    file_obj_update = FileObject.objects.get(uid=uid)
-                    file_obj_update.latest_version_id = new_version_id
-                    file_obj_update.trashed_at = timezone.now()
-                    file_obj_update.save()
-
-                    # Log trash action per file
-                    FileActionLog.objects.create(
-                        file=file_obj_update,
-                        action="trashed",
-                        performed_by=user,
-                        performed_at=timezone.now(),
-                        reason="File trashed and moved to glacier storage."
-                    )
-                except FileObject.DoesNotExist:
+                result = json.loads(line)  # file_uid and new_version_id per file, then a summary line
+                fobj = files_by_uid.get(result.get("file_uid"))
+                if fobj is None or not result.get("new_version_id"):
                     continue
+                batch.append((fobj, result["new_version_id"]))
+                if len(batch) >= TRASH_BATCH_SIZE:
+                    self.record_trashed(batch, versions_by_file, user)
+                    trashed_count += len(batch)
+                    batch = []
+            if batch:
+                self.record_trashed(batch, versions_by_file, user)
+                trashed_count += len(batch)
+        except requests.RequestException as e:
+            return Response({"error": f"FastAPI trash request failed: {str(e)}"}, status=status.HTTP_502_BAD_GATEWAY)
 
-            # Step 2: Delete older versions from S3 and DB
-            for old_ver in older_versions_payload:
-                try:
-                    del_resp = requests.delete(
-                        f"{FASTAPI_DELETE_FILE_URL}/{old_ver['filename']}",
-                        params={"version_id": old_ver['version_id']},
-                        headers=headers
-                    )
-                    if del_resp.status_code == 200:
-                        # Remove FileVersion record permanently
-                        FileVersion.objects.filter(uid=old_ver["file_version_uid"]).delete()
-                except requests.RequestException:
-                    # Optionally log failure and continue
-                    pass
+        # Step 2: Delete older versions from S3 (batched) and DB
+        if older_versions_payload:
+            try:
+                del_resp = requests.post(
+                    FASTAPI_DELETE_VERSIONS_URL,
+                    json=[{"filename": v["filename"], "version_id": v["version_id"]} for v in older_versions_payload],
+                    headers=headers,
+                    timeout=120
+                )
+                if del_resp.status_code == 200:
+                    deleted = {(d["filename"], d["version_id"]) for d in del_resp.json().get("deleted", [])}
+                    # Remove FileVersion records permanently
+                    FileVersion.objects.filter(uid__in=[
+                        v["file_version_uid"] for v in older_versions_payload
+                        if (v["filename"], v["version_id"]) in deleted
+                    ]).delete()
+            except requests.RequestException:
+                # Optionally log failure and continue
+                pass
 
+        with transaction.atomic():
             # Mark trashed folders' trashed_at recursively
             if file_obj.type == "folder":
                 self.mark_folders_trashed(file_obj, timezone.now())
@@ -148,18 +149,38 @@ class TrashFileAPIView(APIView):
                     self.mark_folders_trashed(file_obj.parent, timezone.now())
 
         return Response({
-            "message": f"Trash process completed for {len(trash_payload)} file(s) and related folders."
+            "message": f"Trash process completed for {trashed_count} file(s) and related folders."
         }, status=status.HTTP_200_OK)
 
+    def record_trashed(self, batch, versions_by_file, user):
+        """Write one batch of trash results: three bulk statements, whatever the batch size."""
+        now = timezone.now()
+        latest_versions = []
+        for fobj, new_version_id in batch:
+            latest_version = versions_by_file[fobj.uid][-1]
+            latest_version.s3_version_id = new_version_id
+            latest_version.storage_class = "GLACIER"
+            latest_version.restore_status = "available"
+            latest_versions.append(latest_version)
+            fobj.latest_version_id = new_version_id
+            fobj.trashed_at = now
+
+        with transaction.atomic():
+            FileVersion.objects.bulk_update(latest_versions, ["s3_version_id", "storage_class", "restore_status"])
+            FileObject.objects.bulk_update([fobj for fobj, _ in batch], ["latest_version_id", "trashed_at"])
+            FileActionLog.objects.bulk_create([
+                FileActionLog(
+                    file=fobj,
+                    action="trashed",
+                    performed_by=user,
+                    performed_at=now,
+                    reason="File trashed and moved to glacier storage."
+                )
+                for fobj, _ in batch
+            ])
+
     def get_all_descendant_files(self, folder):
-        descendants = []
-        children = FileObject.objects.filter(parent=folder, trashed_at__isnull=True)
-        for child in children:
-            if child.type == "folder":
-                descendants.extend(self.get_all_descendant_files(child))
-            else:
-                descendants.append(child)
-        return descendants
+        return [obj for obj in folder.get_descendants() if obj.type != "folder"]
 
     def mark_folders_trashed(self, folder, trashed_time):
         folder.trashed_at = trashed_time
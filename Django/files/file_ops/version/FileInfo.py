@@ -7,9 +7,8 @@ from django.shortcuts import get_object_or_404
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject
 from sharing.models import FileAccessControl
-from files.models import FileObject
-from sharing.models import FileAccessControl
-from ...serializers import AccessInfoSerializer, SharedUserSerializer  # We'll define these below
+from sharing.access import resolve_access
+from ...serializers import SharedUserSerializer
 
 class FileInfoAPIView(APIView):
     authentication_classes = [CustomJWEAuthentication]
@@ -21,18 +20,13 @@ class FileInfoAPIView(APIView):
         file = get_object_or_404(FileObject, uid=file_uid, trashed_at__isnull=True)
 
         # 1. Check access
-        is_owner = file.owner == user
-        access_control = FileAccessControl.objects.filter(file=file, user=user).first()
+        your_level, grant = resolve_access(user, file)
 
-        if not is_owner and not access_control:
+        if not your_level:
             return Response({"error": "You do not have access to this file/folder."}, status=403)
 
         # 2. Path
-        path = []
-        curr = file.parent
-        while curr:
-            path.insert(0, curr.name)
-            curr = curr.parent
+        path = [ancestor.name for ancestor in file.get_ancestors()]
         if file.type == "file":
             path.append(file.name)
 
@@ -40,15 +34,17 @@ class FileInfoAPIView(APIView):
         is_starred = file.starred_by.filter(uid=user.uid).exists()
 
         # 4. Access Info (your level)
-        if is_owner:
-            access_info = {
-                "your_level": "owner",
-                "shared_by": None,
-                "inherited": False,
-                "inherited_from": None,
-            }
-        else:
-            access_info = AccessInfoSerializer(access_control).data
+        # A grant on an ancestor (or owning an ancestor) means the access is inherited
+        inherited = your_level != "owner" and (grant is None or grant.file_id != file.uid)
+        access_info = {
+            "your_level": your_level,
+            "shared_by": grant.granted_by.email if grant and grant.granted_by else None,
+            "inherited": inherited,
+            "inherited_from": {
+                "uid": str(grant.file.uid),
+                "name": grant.file.name
+            } if inherited and grant else None,
+        }
 
         # 5. Shared users (exclude inherited)
         shared_users_qs = FileAccessControl.objects.filter(file=file, inherited=False).select_related('user', 'granted_by')
@@ -1,5 +1,3 @@
-import io
-from urllib.parse import quote
 from uuid import UUID
 import requests
 import json
@@ -12,10 +10,10 @@ from django.db import transaction
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject, FileVersion
 from sharing.models import FileAccessControl
+from sharing.permissions import can_edit
 
 
-FASTAPI_DOWNLOAD_URL = "http://127.0.0.1:8081/download_file"
-FASTAPI_UPLOAD_URL = "http://127.0.0.1:8081/upload"
+FASTAPI_COPY_URL = "http://127.0.0.1:8081/copy_file"
 
 
 class SaveAsCopyAPIView(APIView):
@@ -43,14 +41,8 @@ class SaveAsCopyAPIView(APIView):
             return Response({"error": "Source file not found."}, status=status.HTTP_404_NOT_FOUND)
 
         # Permission check: Only owner or editor can duplicate
-        if file_obj.owner != user:
-            has_editor_access = FileAccessControl.objects.filter(
-                file=file_obj,
-                user=user,
-                access_level='editor'
-            ).exists()
-            if not has_editor_access:
-                return Response({"error": "Permission denied to duplicate this file."}, status=status.HTTP_403_FORBIDDEN)
+        if not can_edit(user, file_obj):
+            return Response({"error": "Permission denied to duplicate this file."}, status=status.HTTP_403_FORBIDDEN)
 
         # Validate requested version exists
         version = FileVersion.objects.filter(file=file_obj, s3_version_id=version_id).first()
@@ -74,14 +66,8 @@ class SaveAsCopyAPIView(APIView):
                 return Response({"error": "Invalid target_parent_uid."}, status=status.HTTP_400_BAD_REQUEST)
 
             # Permission check on target folder for upload: owner or editor required
-            if target_parent.owner != user:
-                has_editor_access = FileAccessControl.objects.filter(
-                    file=target_parent,
-                    user=user,
-                    access_level='editor'
-                ).exists()
-                if not has_editor_access:
-                    return Response({"error": "No permission to upload in target folder."}, status=status.HTTP_403_FORBIDDEN)
+            if not can_edit(user, target_parent):
+                return Response({"error": "No permission to upload in target folder."}, status=status.HTTP_403_FORBIDDEN)
 
         else:
             # If no target_parent specified, place in root (parent=None) owned by user
@@ -97,44 +83,26 @@ class SaveAsCopyAPIView(APIView):
         if is_restore and (file_obj.owner != user):
             return Response({"error": "Only owner can restore older versions to the original location."}, status=status.HTTP_403_FORBIDDEN)
 
-        # Download file from FastAPI download endpoint
-        filename_encoded = quote(original_filename)
-
+        # Copy the version server-side in S3; no bytes pass through Django or FastAPI
         headers = {
             "Authorization": f"Bearer {request.auth}"
         }
-        download_url = f"{FASTAPI_DOWNLOAD_URL}/{filename_encoded}"
-        params = {"version_id": version_id}
-
-        try:
-            download_resp = requests.get(download_url, headers=headers, params=params, timeout=60)
-            if download_resp.status_code != 200:
-                return Response({"error": f"Failed to download file: {download_resp.text}"}, status=download_resp.status_code)
-        except requests.RequestException as e:
-            return Response({"error": f"Download failed: {str(e)}"}, status=status.HTTP_502_BAD_GATEWAY)
-
-        file_content = io.BytesIO(download_resp.content)
-        file_content.seek(0)
-        
-        # Prepare files payload for FastAPI upload endpoint
-        content_type = download_resp.headers.get("Content-Type", "application/octet-stream")
-        files = {
-            "files": (upload_filename, file_content, content_type)
+        payload = {
+            "source_filename": original_filename,
+            "version_id": version_id,
+            "new_filename": upload_filename,
         }
 
-        # Upload file to FastAPI upload endpoint
         try:
-            upload_resp = requests.post(FASTAPI_UPLOAD_URL, files=files, headers=headers, timeout=60)
-            if upload_resp.status_code != 200:
-                return Response({"error": f"Upload failed: {upload_resp.text}"}, status=upload_resp.status_code)
-            upload_resp_data = upload_resp.json()
+            copy_resp = requests.post(FASTAPI_COPY_URL, json=payload, headers=headers, timeout=60)
+            if copy_resp.status_code != 200:
+                return Response({"error": f"Copy failed: {copy_resp.text}"}, status=copy_resp.status_code)
+            upload_info = copy_resp.json()
         except requests.RequestException as e:
-            return Response({"error": f"Upload failed: {str(e)}"}, status=status.HTTP_502_BAD_GATEWAY)
-
-        if not upload_resp_data or not isinstance(upload_resp_data, list):
-            return Response({"error": "Invalid upload response."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({"error": f"Copy failed: {str(e)}"}, status=status.HTTP_502_BAD_GATEWAY)
 
-        upload_info = upload_resp_data[0]
+        if not upload_info or not isinstance(upload_info, dict):
+            return Response({"error": "Invalid copy response."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Extract upload metadata
         cdn_url = upload_info.get("cdn_url")
@@ -146,7 +114,7 @@ class SaveAsCopyAPIView(APIView):
         )}
 
         if not cdn_url or not new_version_id:
-            return Response({"error": "Upload response missing critical data."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({"error": "Copy response missing critical data."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         with transaction.atomic():
             # Create new FileObject record
@@ -173,17 +141,17 @@ class SaveAsCopyAPIView(APIView):
                 initial_filename_snapshot=upload_filename
             )
 
-            # Copy over access controls (ACLs) from original file
-            source_acls = FileAccessControl.objects.filter(file=file_obj)
-            for acl in source_acls:
-                FileAccessControl.objects.create(
+            # Copy over direct grants from the original file; inherited access comes from the new parent
+            source_acls = FileAccessControl.objects.filter(file=file_obj, inherited=False)
+            FileAccessControl.objects.bulk_create([
+                FileAccessControl(
                     file=new_file,
                     user=acl.user,
                     access_level=acl.access_level,
-                    granted_by=acl.granted_by,
-                    inherited=acl.inherited,
-                    inherited_from=acl.inherited_from
+                    granted_by=acl.granted_by
                 )
+                for acl in source_acls
+            ])
 
         return Response({
             "message": "File duplicated successfully",
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:12
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("files", "0007_fileversion_initial_filename_snapshot_fileactionlog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="S3KeyIndex",
+            fields=[
+                (
+                    "uid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255, unique=True)),
+                ("s3_key", models.CharField(max_length=1024)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    FileObject = apps.get_model("files", "FileObject")
+
+    # Walk the tree one level at a time so each parent's path is known before its children
+    level = list(FileObject.objects.filter(parent__isnull=True))
+    parent_paths = {}
+    while level:
+        for obj in level:
+            obj.path = f"{parent_paths.get(obj.parent_id, '/')}{obj.uid}/"
+        FileObject.objects.bulk_update(level, ["path"], batch_size=1000)
+        parent_paths = {obj.uid: obj.path for obj in level}
+        level = list(FileObject.objects.filter(parent_id__in=list(parent_paths)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("files", "0008_s3keyindex"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fileobject",
+            name="path",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="fileobject",
+            index=models.Index(
+                fields=["path"],
+                name="files_fileo_path_pattern_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ),
+    ]
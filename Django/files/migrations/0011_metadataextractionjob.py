@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:05
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("files", "0010_uploadsession"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetadataExtractionJob",
+            fields=[
+                (
+                    "uid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("s3_key", models.CharField(max_length=1024)),
+                ("version_id", models.CharField(blank=True, max_length=255, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("metadata", models.JSONField(blank=True, null=True)),
+                ("run_after", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "run_after"],
+                        name="files_metad_status_e898d4_idx",
+                    ),
+                    models.Index(
+                        fields=["version_id"],
+                        name="files_metad_version_53578e_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 import uuid
 from accounts.models import CustomUser
  
@@ -20,6 +22,9 @@ class FileObject(models.Model):
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
     tags = models.TextField(blank=True, null=True)
     trashed_at = models.DateTimeField(null=True, blank=True)
+    # Materialized path of uids from the root down to this node: "/<root uid>/.../<own uid>/"
+    # Built from uids, so renames never touch it; moves rewrite the moved subtree's prefix.
+    path = models.TextField(default="", editable=False)
  
     class Meta:
         indexes = [
@@ -27,6 +32,53 @@ class FileObject(models.Model):
             models.Index(fields=["parent", "name", "type"]),
             models.Index(fields=["owner", "name", "type", "parent"]),
             models.Index(fields=["parent", "type", "name"]),
+            models.Index(fields=["path"], name="files_fileo_path_pattern_idx", opclasses=["text_pattern_ops"]),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parent_id = instance.__dict__.get("parent_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        old_path = self.path
+        if not old_path or self.parent_id != getattr(self, "_loaded_parent_id", None):
+            parent_path = self.parent.path if self.parent_id else "/"
+            self.path = f"{parent_path}{self.uid}/"
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "path" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "path"]
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_path and old_path != self.path:
+                # Re-root every descendant in one UPDATE
+                FileObject.objects.filter(path__startswith=old_path).exclude(uid=self.uid).update(
+                    path=Concat(Value(self.path), Substr("path", len(old_path) + 1), output_field=models.TextField())
+                )
+        self._loaded_parent_id = self.parent_id
+
+    def ancestor_uids(self):
+        """Uids of every ancestor, root first."""
+        return [uuid.UUID(uid) for uid in self.path.strip("/").split("/")[:-1]]
+
+    def get_ancestors(self):
+        """Ancestor objects, root first, in a single query."""
+        ancestor_uids = self.ancestor_uids()
+        by_uid = FileObject.objects.in_bulk(ancestor_uids)
+        return [by_uid[uid] for uid in ancestor_uids if uid in by_uid]
+
+    def is_descendant_of(self, other):
+        return self.uid != other.uid and self.path.startswith(other.path)
+
+    def get_descendants(self):
+        """Non-trashed descendants in a single query, skipping anything below a trashed folder."""
+        subtree = list(FileObject.objects.filter(path__startswith=self.path).exclude(uid=self.uid))
+        trashed_prefixes = tuple(obj.path for obj in subtree if obj.trashed_at is not None)
+        return [
+            obj for obj in subtree
+            if obj.trashed_at is None and not obj.path.startswith(trashed_prefixes)
         ]
  
     # class Meta:
@@ -94,3 +146,69 @@ class FileActionLog(models.Model):
             models.Index(fields=["performed_by", "performed_at"]),
         ]
         ordering = ['-performed_at']
+
+class S3KeyIndex(models.Model):
+    uid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255, unique=True)
+    s3_key = models.CharField(max_length=1024)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class UploadSession(models.Model):
+    """An S3 multipart upload in flight, kept so clients can resume and stale uploads can be aborted."""
+    STATUS_CHOICES = [
+        ('in_progress', 'In progress'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+    SOURCE_CHOICES = [
+        ('direct', 'Direct (presigned)'),
+        ('server', 'Server-side'),
+    ]
+
+    uid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    upload_id = models.CharField(max_length=1024, unique=True)
+    s3_key = models.CharField(max_length=1024)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    part_size = models.BigIntegerField(null=True, blank=True)
+    parts_done = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='direct')
+    uploaded_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='upload_sessions')
+    parent = models.ForeignKey(FileObject, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expires_at"]),
+        ]
+
+class MetadataExtractionJob(models.Model):
+    """Queued metadata extraction for an uploaded object version, run by the FastAPI worker."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    uid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    s3_key = models.CharField(max_length=1024)
+    version_id = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    metadata = models.JSONField(null=True, blank=True)  # Extracted result, kept until the file rows exist
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    run_after = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+            models.Index(fields=["version_id"]),
+        ]
@@ -1,3 +1,66 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from uuid import uuid4
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import CustomUser
+from files.file_ops.ListChildren import encode_cursor, decode_cursor
+from files.file_ops.ListFiles import ListUserFilesAPIView
+from files.models import FileObject, StarredFile
+
+
+class ChildCursorTests(SimpleTestCase):
+    def test_cursor_round_trips_the_keyset(self):
+        uid = uuid4()
+        cursor = encode_cursor(SimpleNamespace(type="file", name="Q3 report.pdf", uid=uid))
+        self.assertEqual(decode_cursor(cursor), ("file", "Q3 report.pdf", uid))
+
+    def test_cursor_survives_non_ascii_names_and_is_url_safe(self):
+        uid = uuid4()
+        cursor = encode_cursor(SimpleNamespace(type="folder", name="Résumés/€ ?&", uid=uid))
+        self.assertNotRegex(cursor, r"[+/]")
+        self.assertEqual(decode_cursor(cursor), ("folder", "Résumés/€ ?&", uid))
+
+
+class FileTreeQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email="tree@example.com", password="pass")
+
+    def build_tree(self, parent, depth, breadth):
+        for index in range(breadth):
+            FileObject.objects.create(owner=self.user, parent=parent, name=f"file-{depth}-{index}.txt", type="file")
+            if depth > 1:
+                folder = FileObject.objects.create(owner=self.user, parent=parent, name=f"folder-{depth}-{index}", type="folder")
+                self.build_tree(folder, depth - 1, breadth)
+
+    def list_files(self):
+        request = APIRequestFactory().get("/files/list-files/")
+        force_authenticate(request, user=self.user)
+        return ListUserFilesAPIView.as_view()(request)
+
+    def test_nested_tree_is_listed_in_a_fixed_number_of_queries(self):
+        # One recursive CTE for the tree and one for starred uids, however deep or wide it is
+        self.build_tree(None, depth=2, breadth=2)
+        with self.assertNumQueries(2):
+            self.list_files()
+
+        self.build_tree(FileObject.objects.get(name="folder-2-0"), depth=4, breadth=3)
+        with self.assertNumQueries(2):
+            response = self.list_files()
+        self.assertEqual(response.status_code, 200)
+
+    def test_tree_nests_children_and_skips_trashed_items(self):
+        root = FileObject.objects.create(owner=self.user, name="docs", type="folder")
+        sub = FileObject.objects.create(owner=self.user, parent=root, name="reports", type="folder")
+        report = FileObject.objects.create(owner=self.user, parent=sub, name="q3.pdf", type="file")
+        FileObject.objects.create(owner=self.user, parent=sub, name="old.pdf", type="file", trashed_at="2026-01-01T00:00:00Z")
+        StarredFile.objects.create(user=self.user, file=report)
+
+        data = self.list_files().data
+        self.assertEqual([node["name"] for node in data], ["docs"])
+        reports = data[0]["children"][0]
+        self.assertEqual(reports["path"], "/docs/reports")
+        self.assertEqual([child["name"] for child in reports["children"]], ["q3.pdf"])
+        self.assertTrue(reports["children"][0]["is_starred"])
@@ -2,6 +2,7 @@
 from django.urls import path
 from .file_ops.Upload import MultiFileUploadAPIView
 from .file_ops.ListFiles import ListUserFilesAPIView
+from .file_ops.ListChildren import FolderChildrenAPIView
 from .file_ops.CreateFolder import CreateFolderAPIView
 from .file_ops.RenameFileOrFolder import RenameFileOrFolderAPIView
 from .file_ops.Move import MoveFileOrFolderAPIView
@@ -18,6 +19,7 @@ urlpatterns = [
     path('upload/', MultiFileUploadAPIView.as_view(), name='file-upload'),
     path('create-folder/', CreateFolderAPIView.as_view(), name='create-folder'),
     path('list-files/', ListUserFilesAPIView.as_view(), name='list-files'),
+    path('folder-children/', FolderChildrenAPIView.as_view(), name='folder-children'),
     path('rename/', RenameFileOrFolderAPIView.as_view(), name='rename'),
     path('move/', MoveFileOrFolderAPIView.as_view(), name='move'),  
     path('toggle-star/', ToggleStarAPIView.as_view(), name='toggle-star'),
@@ -0,0 +1,30 @@
+from files.models import FileObject
+from sharing.models import FileAccessControl
+
+ACCESS_RANK = {"viewer": 1, "editor": 2, "owner": 3}
+
+
+def resolve_access(user, file_obj):
+    """Compute (access_level, grant) for `user` on `file_obj` straight from the database.
+
+    The nearest direct grant on the node or one of its ancestors wins, and owning any
+    ancestor counts as editor. `grant` is the FileAccessControl row the level comes from,
+    or None when it comes from ownership.
+    """
+    if file_obj.owner_id == user.pk:
+        return "owner", None
+
+    ancestor_uids = file_obj.ancestor_uids()
+    chain = ancestor_uids + [file_obj.uid]
+    depth = {uid: index for index, uid in enumerate(chain)}
+
+    grants = FileAccessControl.objects.filter(
+        file_id__in=chain, user=user, inherited=False
+    ).select_related("file", "granted_by")
+    grant = max(grants, key=lambda g: depth[g.file_id], default=None)
+
+    if (grant is None or grant.access_level != "editor") and ancestor_uids and \
+            FileObject.objects.filter(uid__in=ancestor_uids, owner=user).exists():
+        return "editor", None
+
+    return (grant.access_level, grant) if grant else (None, None)
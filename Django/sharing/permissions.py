@@ -0,0 +1,94 @@
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from sharing.access import ACCESS_RANK, resolve_access
+
+PERMISSION_CACHE_TIMEOUT = getattr(settings, "PERMISSION_CACHE_TIMEOUT", 60)  # seconds
+# Cache alias for cross-request permission caching. A lookup there must be cheaper than
+# resolving access (two indexed queries), so database-backed caches are not used.
+PERMISSION_CACHE_ALIAS = getattr(settings, "PERMISSION_CACHE_ALIAS", "default")
+PERMISSION_GENERATION_KEY = "sharing:permission_generation:{root}"
+
+# Bumped alongside the shared generations so memos in this process go stale immediately
+_local_generations = defaultdict(int)
+
+
+def get_shared_cache():
+    """The cross-request cache, or None when only the per-request memo should be used."""
+    cache = caches[PERMISSION_CACHE_ALIAS]
+    if isinstance(cache, (DatabaseCache, DummyCache)):
+        return None
+    return cache
+
+
+def root_of(path):
+    """Uid (as a string) of the tree a materialized path belongs to."""
+    return path.strip("/").split("/", 1)[0]
+
+
+def get_permission_generation(cache, root):
+    """Shared cache generation for one tree; bumping it invalidates the tree's cached access levels."""
+    key = PERMISSION_GENERATION_KEY.format(root=root)
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so a culled key never resurrects an older generation
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_permissions(root):
+    """Drop cached access levels for one tree after an ACL write or a move into it."""
+    _local_generations[root] += 1
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    key = PERMISSION_GENERATION_KEY.format(root=root)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def get_effective_access(user, file_obj):
+    """Effective access level ("owner", "editor", "viewer" or None) for `user` on `file_obj`.
+
+    Looks in the per-request memo (kept on the request's user object), then the shared
+    cache when one is configured, then resolves from the database.
+    """
+    if file_obj.owner_id == user.pk:
+        return "owner"
+
+    root = root_of(file_obj.path)
+    memo = user.__dict__.setdefault("_access_memo", {})
+    entry = memo.get(file_obj.uid)
+    if entry and entry[0] == (root, _local_generations[root]):
+        return entry[1]
+
+    cache = get_shared_cache()
+    if cache is None:
+        level, _ = resolve_access(user, file_obj)
+    else:
+        key = f"sharing:access:{root}:{get_permission_generation(cache, root)}:{user.pk}:{file_obj.uid}"
+        level = cache.get(key)
+        if level is None:
+            level, _ = resolve_access(user, file_obj)
+            # Cache "no access" as an empty string so it is distinguishable from a miss
+            cache.set(key, level or "", PERMISSION_CACHE_TIMEOUT)
+
+    level = level or None
+    memo[file_obj.uid] = ((root, _local_generations[root]), level)
+    return level
+
+
+def has_access(user, file_obj, level="viewer"):
+    effective = get_effective_access(user, file_obj)
+    return effective is not None and ACCESS_RANK[effective] >= ACCESS_RANK[level]
+
+
+def can_edit(user, file_obj):
+    """The owner-or-editor check shared by every write endpoint."""
+    return has_access(user, file_obj, "editor")
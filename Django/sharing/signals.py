@@ -0,0 +1,28 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from files.models import FileObject
+from sharing.models import FileAccessControl
+from sharing.permissions import invalidate_permissions, root_of
+
+
+@receiver(post_save, sender=FileAccessControl)
+@receiver(post_delete, sender=FileAccessControl)
+def acl_changed(sender, instance, **kwargs):
+    try:
+        path = instance.file.path
+    except FileObject.DoesNotExist:
+        # The file itself is being deleted, so nothing can be cached against it any more
+        return
+    # After commit, so no other request can re-cache the pre-write answer
+    transaction.on_commit(partial(invalidate_permissions, root_of(path)))
+
+
+@receiver(post_save, sender=FileObject)
+def file_moved(sender, instance, created, **kwargs):
+    # FileObject.save() refreshes _loaded_parent_id only after post_save has fired.
+    # Cached levels are keyed by the file's current tree, so only the tree it moved into
+    # can hold stale answers.
+    if not created and instance.parent_id != getattr(instance, "_loaded_parent_id", instance.parent_id):
+        transaction.on_commit(partial(invalidate_permissions, root_of(instance.path)))
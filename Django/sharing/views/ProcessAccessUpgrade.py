@@ -5,7 +5,6 @@ from django.utils import timezone
 from django.db import transaction
 from accounts.authentication import CustomJWEAuthentication
 from sharing.models import FileShareRequest, FileAccessControl
-from files.models import FileObject
 from notifications.models import Notification
 
 class ProcessAccessUpgradeAPIView(APIView):
@@ -47,24 +46,6 @@ class ProcessAccessUpgradeAPIView(APIView):
                         "inherited_from": None
                     }
                 )
-                # Inherit access for descendants (if folder)
-                if file_obj.type == "folder":
-                    descendants = self.get_all_descendants(file_obj)
-                    for child in descendants:
-                        if not FileAccessControl.objects.filter(
-                            file=child, user=access_request.target_user, inherited=False
-                        ).exists():
-                            FileAccessControl.objects.update_or_create(
-                                file=child,
-                                user=access_request.target_user,
-                                defaults={
-                                    "access_level": access_request.access_type,
-                                    "granted_by": owner,
-                                    "granted_at": timezone.now(),
-                                    "inherited": True,
-                                    "inherited_from": file_obj
-                                }
-                            )
                 access_request.status = "approved"
                 access_request.reviewed_by = owner
                 access_request.reviewed_at = timezone.now()
@@ -95,12 +76,3 @@ class ProcessAccessUpgradeAPIView(APIView):
                 )
 
         return Response({"message": f"Request {action}ed."}, status=200)
-
-    def get_all_descendants(self, folder):
-        descendants = []
-        children = FileObject.objects.filter(parent=folder, trashed_at__isnull=True)
-        for child in children:
-            descendants.append(child)
-            if child.type == "folder":
-                descendants.extend(self.get_all_descendants(child))
-        return descendants
@@ -3,7 +3,9 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject
-from sharing.models import FileAccessControl, FileShareRequest
+from sharing.models import FileShareRequest
+from sharing.access import ACCESS_RANK
+from sharing.permissions import get_effective_access
 from notifications.models import Notification
 
 class RequestAccessUpgradeAPIView(APIView):
@@ -24,14 +26,12 @@ class RequestAccessUpgradeAPIView(APIView):
             return Response({"error": "File not found."}, status=404)
 
         # Check current access level for user on this file/folder
-        fac = FileAccessControl.objects.filter(file=file_obj, user=user).first()
-        if not fac:
+        current_access = get_effective_access(user, file_obj)
+        if not current_access:
             return Response({"error": "You do not have access to this file/folder to request an upgrade."}, status=403)
 
-        current_access = fac.access_level
         # If user already has requested or higher access, reject the request
-        access_levels = {"viewer": 1, "editor": 2}
-        if access_levels.get(requested_access) <= access_levels.get(current_access):
+        if ACCESS_RANK[requested_access] <= ACCESS_RANK[current_access]:
             return Response({"error": f"You already have {current_access} or higher access."}, status=400)
 
         # Only owner can grant approval, so identify owner
@@ -129,6 +129,7 @@ from accounts.models import CustomUser
 from accounts.authentication import CustomJWEAuthentication
 from files.models import FileObject
 from sharing.models import FileAccessControl, FileShareRequest
+from sharing.permissions import get_effective_access
 from notifications.models import Notification
 
 class ShareFileOrFolderAPIView(APIView):
@@ -148,10 +149,9 @@ class ShareFileOrFolderAPIView(APIView):
             return Response({"error": "File or folder not found."}, status=404)
 
         user = request.user
-        is_owner = file_obj.owner == user
-        is_editor = FileAccessControl.objects.filter(
-            file=file_obj, user=user, access_level="editor"
-        ).exists()
+        access = get_effective_access(user, file_obj)
+        is_owner = access == "owner"
+        is_editor = access == "editor"
 
         if not (is_owner or is_editor):
             return Response({"error": "You do not have permission to share this file or folder."}, status=403)
@@ -208,24 +208,6 @@ class ShareFileOrFolderAPIView(APIView):
                         message=f"You have been granted {access_level} access to '{file_obj.name}'.",
                         related_file=file_obj
                     )
-                    # Grant access to children (if folder)
-                    if file_obj.type == "folder":
-                        descendants = self.get_all_descendants(file_obj)
-                        for child in descendants:
-                            # Skip if direct (non-inherited) sharing already exists
-                            if FileAccessControl.objects.filter(file=child, user=target_user, inherited=False).exists():
-                                continue
-                            FileAccessControl.objects.update_or_create(
-                                file=child,
-                                user=target_user,
-                                defaults={
-                                    "access_level": access_level,
-                                    "granted_by": user,
-                                    "granted_at": timezone.now(),
-                                    "inherited": True,
-                                    "inherited_from": file_obj
-                                }
-                            )
                 results.append({
                     "email": email,
                     "status": "created" if created else "updated",
@@ -275,12 +257,3 @@ class ShareFileOrFolderAPIView(APIView):
             "shared_by": user.email,
             "results": results
         }, status=200)
-
-    def get_all_descendants(self, folder):
-        descendants = []
-        children = FileObject.objects.filter(parent=folder, trashed_at__isnull=True)
-        for child in children:
-            descendants.append(child)
-            if child.type == "folder":
-                descendants.extend(self.get_all_descendants(child))
-        return descendants
@@ -23,10 +23,14 @@ class SharedWithMeAPIView(APIView):
             str(sid) for sid in StarredFile.objects.filter(user=user, file_id__in=shared_file_uids).values_list("file__uid", flat=True)
         )
 
+        # Names of every ancestor of every shared item, fetched in one query
+        ancestor_uids = {uid for entry in access_entries for uid in entry.file.ancestor_uids()}
+        ancestor_names = dict(FileObject.objects.filter(uid__in=ancestor_uids).values_list("uid", "name"))
+
         shared = []
         for access in access_entries:
             file_obj = access.file
-            path = self.build_path(file_obj)
+            path = self.build_path(file_obj, ancestor_names)
 
             shared.append({
                 "uid": str(file_obj.uid),
@@ -47,10 +51,7 @@ class SharedWithMeAPIView(APIView):
 
         return Response({"shared": shared})
 
-    def build_path(self, file_obj):
-        path = []
-        current = file_obj
-        while current:
-            path.insert(0, current.name)
-            current = current.parent
+    def build_path(self, file_obj, ancestor_names):
+        path = [ancestor_names[uid] for uid in file_obj.ancestor_uids() if uid in ancestor_names]
+        path.append(file_obj.name)
         return path
@@ -0,0 +1,65 @@
+import json
+import uuid
+import base64
+import datetime
+
+from fastapi import HTTPException, Request
+from jwcrypto import jwk, jwe
+
+from app.core.config import JWE_SECRET_KEY
+from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
+from app.db.pg_models import CustomUser
+
+
+def _get_secret_key():
+    key_bytes = base64.urlsafe_b64decode(JWE_SECRET_KEY or "")
+    if len(key_bytes) != 32:
+        raise ValueError("JWE_SECRET_KEY must decode to 32 bytes.")
+    return jwk.JWK(kty='oct', k=base64.urlsafe_b64encode(key_bytes).decode())
+
+
+# Function to decrypt a token issued by Django (accounts.utils.jwe_utils.encrypt_jwe)
+def decrypt_jwe(token: str) -> dict:
+    decrypted = jwe.JWE()
+    decrypted.deserialize(token, key=_get_secret_key())
+    return json.loads(decrypted.payload)
+
+
+# Function to authenticate the caller from its bearer access token
+# Mirrors Django's CustomJWEAuthentication, so a token revoked there is refused here too.
+# Used as a route dependency; the verified user id is also left on request.state.
+async def get_current_user_id(request: Request) -> str:
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Authentication credentials were not provided.")
+
+    try:
+        payload = decrypt_jwe(auth_header.split("Bearer ", 1)[1])
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
+
+    if payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="Expected access token.")
+
+    try:
+        expires_at = datetime.datetime.fromisoformat(payload["exp"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid expiration timestamp format.")
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=datetime.timezone.utc)
+    if datetime.datetime.now(datetime.timezone.utc) > expires_at:
+        raise HTTPException(status_code=401, detail="Access token has expired.")
+
+    try:
+        user_uid = uuid.UUID(str(payload.get("uid")))
+    except ValueError:
+        raise HTTPException(status_code=401, detail="User not found.")
+    async with pg_session() as session:
+        user = await session.get(CustomUser, user_uid)
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found.")
+    if user.access_token_version != payload.get("access_token_version"):
+        raise HTTPException(status_code=401, detail="Token is stale or revoked.")
+
+    request.state.user_id = str(user.uid)
+    return request.state.user_id
@@ -11,6 +11,44 @@ S3_UPLOAD_FOLDER = os.getenv("S3_UPLOAD_FOLDER", "uploads/")
 CDN_DOMAIN = os.getenv("CDN_DOMAIN")
 AWS_REGION = os.getenv("AWS_REGION")
 
+# Same key Django uses to encrypt access tokens; FastAPI decrypts them to identify the caller
+JWE_SECRET_KEY = os.getenv("JWE_SECRET_KEY")
+
+# Shared S3 client: connection pool size and the executor that runs boto3 calls
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+S3_EXECUTOR_WORKERS = int(os.getenv("S3_EXECUTOR_WORKERS", str(S3_MAX_POOL_CONNECTIONS)))
+
+# Multipart upload engine
+S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "8"))
+S3_UPLOAD_MEMORY_BUDGET_MB = int(os.getenv("S3_UPLOAD_MEMORY_BUDGET_MB", "512"))
+S3_UPLOAD_PART_RETRIES = int(os.getenv("S3_UPLOAD_PART_RETRIES", "4"))
+
+# Concurrent storage-class transitions for the bulk trash endpoint
+S3_TRASH_CONCURRENCY = int(os.getenv("S3_TRASH_CONCURRENCY", "32"))
+
+# Lifetime of presigned download URLs, in seconds
+PRESIGNED_DOWNLOAD_EXPIRY = int(os.getenv("PRESIGNED_DOWNLOAD_EXPIRY", "300"))
+
+# Multipart upload sessions: how long one may sit idle, and how the reaper sweeps stale ones
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_REAPER_INTERVAL_SECONDS = int(os.getenv("UPLOAD_REAPER_INTERVAL_SECONDS", "3600"))
+UPLOAD_REAPER_BATCH_SIZE = int(os.getenv("UPLOAD_REAPER_BATCH_SIZE", "100"))
+
+# Metadata extraction process pool: worker count, recycling, per-worker address-space cap
+# and the timeout used for file types without their own entry
+METADATA_WORKERS = int(os.getenv("METADATA_WORKERS", str(os.cpu_count() or 2)))
+METADATA_MAX_TASKS_PER_CHILD = int(os.getenv("METADATA_MAX_TASKS_PER_CHILD", "50"))
+METADATA_MEMORY_LIMIT_MB = int(os.getenv("METADATA_MEMORY_LIMIT_MB", "1024"))
+METADATA_DEFAULT_TIMEOUT = int(os.getenv("METADATA_DEFAULT_TIMEOUT", "30"))
+
+# Deferred metadata extraction queue
+METADATA_JOB_POLL_SECONDS = int(os.getenv("METADATA_JOB_POLL_SECONDS", "2"))
+METADATA_JOB_BATCH_SIZE = int(os.getenv("METADATA_JOB_BATCH_SIZE", str(METADATA_WORKERS)))
+METADATA_JOB_MAX_ATTEMPTS = int(os.getenv("METADATA_JOB_MAX_ATTEMPTS", "6"))
+METADATA_JOB_STALE_SECONDS = int(os.getenv("METADATA_JOB_STALE_SECONDS", "900"))
+# How long a finished extraction waits for its FileObject/FileVersion rows to be written
+METADATA_JOB_RECORD_WAIT_HOURS = int(os.getenv("METADATA_JOB_RECORD_WAIT_HOURS", "24"))
+
 # app/core/config.py
 DATABASE_URL = os.getenv("DATABASE_URL")
 POSTGRES_DB_URL = os.getenv("POSTGRES_DB_URL")
\ No newline at end of file
@@ -5,6 +5,12 @@ from app.db.pg_database import PostgresBase
 import uuid
 import enum
 
+# Only the columns FastAPI needs to authenticate a bearer token (see app/core/auth.py)
+class CustomUser(PostgresBase):
+    __tablename__ = "accounts_customuser"
+    uid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    access_token_version = Column(Integer, nullable=False, default=1)
+
 class FileObject(PostgresBase):
     __tablename__ = "files_fileobject"
     uid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -14,16 +20,19 @@ class FileObject(PostgresBase):
     description = Column(Text, nullable=True)
     extension = Column(String(20), nullable=True)
     size = Column(BigInteger, default=0)
-    created_at = Column(DateTime)
-    modified_at = Column(DateTime)
-    accessed_at = Column(DateTime)
-    file_metadata = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    modified_at = Column(DateTime(timezone=True))
+    accessed_at = Column(DateTime(timezone=True))
+    # Django's column is "metadata", a reserved attribute name on declarative models
+    file_metadata = Column("metadata", JSON, nullable=True)
     uploaded_url = Column(String, nullable=True)
     presigned_url = Column(String, nullable=True)
     latest_version_id = Column(String(255), nullable=True)
     parent_id = Column(UUID(as_uuid=True), ForeignKey('files_fileobject.uid'), nullable=True)
     tags = Column(Text, nullable=True)
-    trashed_at = Column(DateTime, nullable=True)
+    trashed_at = Column(DateTime(timezone=True), nullable=True)
+    # No default: every insert must build the path from its parent (see Django FileObject.save)
+    path = Column(Text, nullable=False)
     # relationships
     parent = relationship('FileObject', remote_side=[uid], backref='children')
 
@@ -35,10 +44,51 @@ class FileVersion(PostgresBase):
     action = Column(String(50))
     metadata_snapshot = Column(JSON)
     s3_version_id = Column(String(255), nullable=True)
-    created_at = Column(DateTime)
+    created_at = Column(DateTime(timezone=True))
     created_by_id = Column(UUID(as_uuid=True), nullable=True)
     storage_class = Column(String(50), default="STANDARD") 
     restore_status = Column(String(20), default="available") 
+    initial_filename_snapshot = Column(String(255), nullable=True)
+
+class S3KeyIndex(PostgresBase):
+    __tablename__ = "files_s3keyindex"
+    uid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    filename = Column(String(255), nullable=False, unique=True)
+    s3_key = Column(String(1024), nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+
+class UploadSession(PostgresBase):
+    __tablename__ = "files_uploadsession"
+    uid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    upload_id = Column(String(1024), nullable=False, unique=True)
+    s3_key = Column(String(1024), nullable=False)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False, default="")
+    size = Column(BigInteger, nullable=True)
+    part_size = Column(BigInteger, nullable=True)
+    parts_done = Column(Integer, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default="in_progress")
+    source = Column(String(10), nullable=False, default="direct")
+    uploaded_by_id = Column(UUID(as_uuid=True), nullable=True)
+    parent_id = Column(UUID(as_uuid=True), ForeignKey('files_fileobject.uid'), nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class MetadataExtractionJob(PostgresBase):
+    __tablename__ = "files_metadataextractionjob"
+    uid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    s3_key = Column(String(1024), nullable=False)
+    version_id = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=False, default="")
+    # Same reserved-name workaround as FileObject.file_metadata
+    job_metadata = Column("metadata", JSON, nullable=True)
+    requested_by_id = Column(UUID(as_uuid=True), nullable=True)
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
 
 class TrashAutoCleanQueue(PostgresBase):
     __tablename__ = "files_trashautocleanqueue"
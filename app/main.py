@@ -1,4 +1,8 @@
+import asyncio
 from .routers import files, multipart
+from .service.upload_sessions import run_upload_reaper
+from .service.metadata_extractor.dispatcher import shutdown_metadata_pool
+from .service.metadata_jobs import run_metadata_worker
 from fastapi import FastAPI
 from mangum import Mangum
 
@@ -6,7 +10,21 @@ from mangum import Mangum
 app = FastAPI()
 
 app.include_router(files.router)
-# app.include_router(multipart.router)
+app.include_router(multipart.router)
+
+# Abort multipart uploads that were started and then abandoned
+@app.on_event("startup")
+async def start_upload_reaper():
+    app.state.upload_reaper = asyncio.create_task(run_upload_reaper())
+
+# Drain the deferred metadata extraction queue
+@app.on_event("startup")
+async def start_metadata_worker():
+    app.state.metadata_worker = asyncio.create_task(run_metadata_worker())
+
+@app.on_event("shutdown")
+async def stop_metadata_pool():
+    shutdown_metadata_pool()
 
 # handler = Mangum(app)
 
@@ -1,6 +1,8 @@
-from fastapi import UploadFile, APIRouter, File, Request, Query, Body, HTTPException
+from fastapi import UploadFile, APIRouter, File, Request, Query, Body, HTTPException, Depends
 from typing import List, Dict
 from app.service import file_service
+from app.service.metadata_jobs import get_metadata_job_status
+from app.core.auth import get_current_user_id
 from ..service.s3_utils import generate_presigned_upload_url
 
 router = APIRouter()
@@ -16,8 +18,17 @@ async def record_file_metadata(data: dict = Body(...)):
 
 # Define the router for file operations
 @router.post("/upload")
-async def upload_files(request: Request, files: List[UploadFile] = File(...)):
-    return await file_service.upload_single_or_multiple_files(request, files)
+async def upload_files(request: Request, files: List[UploadFile] = File(...), user_id: str = Query(default=None)):
+    user_id = user_id or getattr(request.state, "user_id", None)
+    return await file_service.upload_single_or_multiple_files(request, files, user_id)
+
+@router.get("/metadata_status")
+async def metadata_status(job_id: str = Query(default=None), version_id: str = Query(default=None), user_id: str = Depends(get_current_user_id)):
+    return await get_metadata_job_status(job_id, version_id, user_id)
+
+@router.post("/copy_file")
+async def copy_file(source_filename: str = Body(...), version_id: str = Body(...), new_filename: str = Body(...)):
+    return await file_service.copy_file_version(source_filename, version_id, new_filename)
 
 @router.get("/list_files")
 async def list_all_files():
@@ -30,7 +41,16 @@ async def api_list_file_versions(filename: str):
 @router.get("/download_file/{filename}")
 async def api_download_file(request: Request,filename: str,version_id: str = Query(default=None),mode: str = Query(default="download", enum=["view", "download", "auto"]),user_id: str = Query(default=None),file_id: str = Query(default=None),):
     user_id = user_id or getattr(request.state, "user_id", None)
-    return await file_service.get_file_response(filename, user_id, version_id, mode, file_id)
+    return await file_service.get_file_response(
+        filename, user_id, version_id, mode, file_id,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+    )
+
+@router.get("/presigned_download/{filename}")
+async def api_presigned_download(request: Request, filename: str, version_id: str = Query(default=None), mode: str = Query(default="download", enum=["view", "download", "auto"]), download_name: str = Query(default=None), user_id: str = Query(default=None)):
+    user_id = user_id or getattr(request.state, "user_id", None)
+    return await file_service.get_presigned_download_url(filename, user_id, version_id, mode, download_name)
 
 @router.put("/rename_file")
 async def rename_file(request: Request,old_filename: str,new_filename: str,user_id: str = Query(default=None),file_id: str = Query(default=None)):
@@ -41,6 +61,10 @@ async def rename_file(request: Request,old_filename: str,new_filename: str,user_
 async def delete_file(files: List[Dict[str, str]] = Body(...)):
     return await file_service.delete_files_by_name(files)
 
+@router.post("/delete_file_versions")
+async def delete_file_versions(files: List[Dict[str, str]] = Body(...)):
+    return await file_service.delete_files_by_name(files)
+
 @router.post("/acl/grant")
 async def grant_acl(file_id: str = Body(...), user_id: str = Body(...), permission: str = Body(...)):
     return await file_service.grant_file_permission(file_id, user_id, permission)
@@ -61,6 +85,10 @@ async def check_acl(file_id: str = Query(...), user_id: str = Query(...), permis
 async def archive_version(files: List[Dict[str, str]] = Body(...)):
     return await file_service.archive_files_to_glacier(files)
 
+@router.post("/trash_files_bulk", tags=["S3 Glacier"])
+async def trash_files_bulk(files: List[Dict[str, str]] = Body(..., embed=True)):
+    return await file_service.trash_files_bulk(files)
+
 @router.post("/s3/restore-from-glacier", tags=["S3 Glacier"])
 async def restore_from_glacier(files: List[Dict[str, str]] = Body(...)):
     return await file_service.restore_files_from_glacier(files)
@@ -1,20 +1,53 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, BackgroundTasks, Depends
+from app.core.auth import get_current_user_id
 from app.service.presigned_multipart import (
+    authorize_upload,
     initiate_presigned_multipart_upload,
     get_presigned_part_url,
+    get_presigned_part_urls,
+    list_uploaded_parts,
+    get_resume_state,
     complete_presigned_multipart_upload,
 )
+from app.service.upload_finalizer import finalize_direct_upload
+from app.service.upload_sessions import mark_upload_session
 
 router = APIRouter()
 
 @router.post("/multipart/initiate")
-def start_upload(filename: str = Query(...), content_type: str = Query(...)):
-    return initiate_presigned_multipart_upload(filename, content_type)
+async def start_upload(filename: str = Query(...), content_type: str = Query(...), parent_id: str = Query(default=None), file_size: int = Query(default=None), user_id: str = Depends(get_current_user_id)):
+    return await initiate_presigned_multipart_upload(filename, content_type, user_id, parent_id, file_size)
 
 @router.get("/multipart/presign-part")
-def presign_part(key: str, upload_id: str, part_number: int):
+async def presign_part(key: str, upload_id: str, part_number: int, user_id: str = Depends(get_current_user_id)):
+    await authorize_upload(key, upload_id, user_id)
+    await mark_upload_session(upload_id)
     return {"url": get_presigned_part_url(key, upload_id, part_number)}
 
+@router.get("/multipart/presign-parts")
+async def presign_parts(key: str, upload_id: str, first_part: int = Query(default=1), last_part: int = Query(default=None), file_size: int = Query(default=None), user_id: str = Depends(get_current_user_id)):
+    await authorize_upload(key, upload_id, user_id)
+    result = get_presigned_part_urls(key, upload_id, first_part, last_part, file_size)
+    # Presigning is the client's heartbeat for a direct upload; keep the session alive
+    await mark_upload_session(upload_id)
+    return result
+
+@router.get("/multipart/parts")
+async def uploaded_parts(key: str, upload_id: str, user_id: str = Depends(get_current_user_id)):
+    await authorize_upload(key, upload_id, user_id)
+    result = await list_uploaded_parts(key, upload_id)
+    await mark_upload_session(upload_id, parts_done=len(result["parts"]))
+    return result
+
+@router.get("/multipart/resume")
+async def resume_upload(upload_id: str, user_id: str = Depends(get_current_user_id)):
+    return await get_resume_state(upload_id, user_id)
+
 @router.post("/multipart/complete")
-def complete_upload(key: str, upload_id: str, parts: list[dict]):
-    return complete_presigned_multipart_upload(key, upload_id, parts)
+async def complete_upload(key: str, upload_id: str, parts: list[dict], background_tasks: BackgroundTasks, user_id: str = Depends(get_current_user_id)):
+    await authorize_upload(key, upload_id, user_id)
+    result = await complete_presigned_multipart_upload(key, upload_id, parts)
+    # Metadata extraction and DB records happen after the response is sent
+    background_tasks.add_task(finalize_direct_upload, key, result["version_id"])
+    result["finalize"] = "scheduled"
+    return result
@@ -76,4 +76,57 @@ async def add_file_access_control(file_id: str, user_id: str, access_level: str)
         session.add(acl)
         await session.commit()
         await session.refresh(acl)
-        return acl
\ No newline at end of file
+        return acl
+
+# Function to check editor rights on a folder the same way Django's resolver does:
+# owning the folder or any ancestor, or the nearest direct grant on the chain being "editor"
+async def can_edit_folder(user_id: str | uuid.UUID, folder: FileObject) -> bool:
+    user_id = uuid.UUID(str(user_id))
+    if folder.owner_id == user_id:
+        return True
+
+    chain = [uuid.UUID(uid) for uid in (folder.path or "").strip("/").split("/") if uid] or [folder.uid]
+    async with pg_session() as session:
+        result = await session.execute(
+            select(FileObject.uid).where(FileObject.uid.in_(chain), FileObject.owner_id == user_id).limit(1)
+        )
+        if result.scalar_one_or_none():
+            return True
+
+        result = await session.execute(
+            select(FileAccessControl.file_id, FileAccessControl.access_level).where(
+                FileAccessControl.file_id.in_(chain),
+                FileAccessControl.user_id == user_id,
+                FileAccessControl.inherited.is_(False)
+            )
+        )
+        grants = result.all()
+
+    if not grants:
+        return False
+    _, access_level = max(grants, key=lambda grant: chain.index(grant.file_id))
+    return access_level == "editor"
+
+
+# Function to check view rights on a file: owning it or any ancestor, or any direct grant on the chain
+async def can_view_file(user_id: str | uuid.UUID, file_obj: FileObject) -> bool:
+    user_id = uuid.UUID(str(user_id))
+    if file_obj.owner_id == user_id:
+        return True
+
+    chain = [uuid.UUID(uid) for uid in (file_obj.path or "").strip("/").split("/") if uid] or [file_obj.uid]
+    async with pg_session() as session:
+        result = await session.execute(
+            select(FileObject.uid).where(FileObject.uid.in_(chain), FileObject.owner_id == user_id).limit(1)
+        )
+        if result.scalar_one_or_none():
+            return True
+
+        result = await session.execute(
+            select(FileAccessControl.uid).where(
+                FileAccessControl.file_id.in_(chain),
+                FileAccessControl.user_id == user_id,
+                FileAccessControl.inherited.is_(False)
+            ).limit(1)
+        )
+        return result.scalar_one_or_none() is not None
@@ -1,23 +1,32 @@
 import os
-import tempfile
+import uuid
+import json
+import math
+import random
 import datetime
-from typing import List, Union, Dict
+from typing import List, Union, Dict, AsyncIterator
+from urllib.parse import quote
 from fastapi import UploadFile, HTTPException, File, Request
 from starlette.responses import StreamingResponse
 from botocore.exceptions import BotoCoreError, ClientError
-from botocore.config import Config
-import boto3
 import asyncio 
-from io import BytesIO
+from email.utils import format_datetime, parsedate_to_datetime
 
-from ..core.config import AWS_S3_BUCKET, S3_UPLOAD_FOLDER, CDN_DOMAIN
-from ..service.metadata_extractor.dispatcher import extract_metadata
+from ..core.config import (
+    AWS_S3_BUCKET, S3_UPLOAD_FOLDER, CDN_DOMAIN,
+    S3_UPLOAD_WORKERS, S3_UPLOAD_MEMORY_BUDGET_MB, S3_UPLOAD_PART_RETRIES,
+    S3_TRASH_CONCURRENCY, PRESIGNED_DOWNLOAD_EXPIRY,
+)
 
 from app.db.pg_models import FileObject, FileVersion
 from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
 from sqlalchemy import select
 
 from app.service.acl_utils import get_file_id_by_filename_and_user, get_user_permission, has_file_access, add_file_access_control
+from app.service.s3_key_index import lookup_s3_key, lookup_s3_keys, record_s3_key, record_s3_keys, forget_s3_key
+from app.service.storage import s3_client, s3_call, run_s3
+from app.service.upload_sessions import create_upload_session, mark_upload_session
+from app.service.metadata_jobs import enqueue_metadata_job
 # from app.db.pg_models import PermissionEnum  # Define this in pg_models.py to match Django
 
 
@@ -41,15 +50,24 @@ INLINE_MIME_TYPES = {
 # Define the chunk size for multipart uploads
 CHUNK_SIZE = 100 * 1024 * 1024  # 100MB
 
-# Initialize the S3 client
-s3_client = boto3.client(
-    "s3",
-    region_name="eu-north-1",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    use_ssl=True,
-    config=Config(signature_version='s3v4', retries={'max_attempts': 3, 'mode': 'standard'})
-)
+# Part sizing limits for the multipart engine (S3 allows at most 10,000 parts of <= 5GB)
+MIN_PART_SIZE = 8 * 1024 * 1024  # 8MB
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024  # 5GB
+MAX_PARTS = 10000
+TARGET_PARTS = 64
+
+# Backoff for retrying a single failed part
+PART_RETRY_BASE_DELAY = 0.5  # seconds
+PART_RETRY_MAX_DELAY = 8.0  # seconds
+
+# Largest object copy_object can copy in one request; bigger objects use upload_part_copy
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * 1024 * 1024  # 5GB
+
+# S3 DeleteObjects accepts at most 1,000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+# Chunk size used when streaming S3 objects back to the client
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 # Function to get the folder name based on file extension
 def get_folder_by_extension(extension: str) -> str:
@@ -66,14 +84,16 @@ def get_folder_by_extension(extension: str) -> str:
 
 
 # Function to upload a single or multiple files
-async def upload_single_or_multiple_files(request: Request, files: Union[UploadFile, List[UploadFile]]):
+async def upload_single_or_multiple_files(request: Request, files: Union[UploadFile, List[UploadFile]], user_id: str = None):
     if isinstance(files, list):
-        return [await save_file(file) for file in files]
-    return await save_file(files)
+        return [await save_file(file, user_id) for file in files]
+    return await save_file(files, user_id)
 
 
 # Function to save a file to S3
-async def save_file(file: UploadFile):
+# The upload spool is streamed to S3 one part at a time, so peak memory is bounded by
+# the part size. Metadata extraction is queued and runs after the response is sent.
+async def save_file(file: UploadFile, user_id: str = None):
     extension = os.path.splitext(file.filename)[1].lower()
     if extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {extension}")
@@ -81,102 +101,308 @@ async def save_file(file: UploadFile):
     folder = get_folder_by_extension(extension)
     s3_key = f"{S3_UPLOAD_FOLDER}{folder}/{file.filename}"
 
-    content = await file.read()
+    upload_size = await get_upload_size(file)
+    part_size = choose_part_size(upload_size)
 
-    tmp_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp:
-            tmp.write(content)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-            tmp_path = tmp.name
-
-        if os.path.getsize(tmp_path) <= CHUNK_SIZE:
-            with open(tmp_path, "rb") as f:
-                response = s3_client.put_object(
-                    Bucket=AWS_S3_BUCKET,
-                    Key=s3_key,
-                    Body=f,
-                    ContentType=file.content_type
-                )
-                version_id = response.get("VersionId")
-        else:
-            version_id = await multipart_upload_to_s3(s3_key, tmp_path, file.content_type)
+        parts = iter_upload_parts(file, part_size)
+        first_part = await anext(parts, b"")
+        second_part = await anext(parts, None)
 
-        metadata = await asyncio.to_thread(extract_metadata, tmp_path)
+        if second_part is None:
+            response = await s3_call(
+                "put_object",
+                Bucket=AWS_S3_BUCKET,
+                Key=s3_key,
+                Body=first_part,
+                ContentType=file.content_type
+            )
+            version_id = response.get("VersionId")
+        else:
+            version_id = await multipart_upload_to_s3(
+                s3_key, chain_parts([first_part, second_part], parts), file.content_type, part_size, upload_size
+            )
 
     except (BotoCoreError, ClientError) as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
-        
+
+    await record_s3_key(file.filename, s3_key)
+    job_id = await enqueue_metadata_job(s3_key, version_id, user_id)
+
     cdn_relative_path = s3_key.replace(f"{S3_UPLOAD_FOLDER}", "")
     cdn_url = f"https://{CDN_DOMAIN}/{cdn_relative_path}"
 
-    metadata.update({
+    return {
         "filename": file.filename,
         "extension": extension,
         "content_type": file.content_type,
-        "size": len(content),
+        "size": upload_size,
         "s3_key": s3_key,
+        "metadata_status": "pending",
+        "metadata_job_id": job_id,
         "cdn_url": cdn_url,
         "version_id": version_id,
         "status": "uploaded", 
         "message": "File uploaded to S3 successfully!"
-    })
-    # await save_file_record_to_db(metadata) # This line is removed as per the edit hint
-    return metadata
+    }
+
+
+# Function to get the size of an upload without reading it
+async def get_upload_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+# Function to pick a part size from the file size
+# Aim for ~TARGET_PARTS parts so uploads run in parallel, keep parts between
+# MIN_PART_SIZE and CHUNK_SIZE, and never exceed S3's 10,000-part limit.
+def choose_part_size(file_size: int) -> int:
+    part_size = min(max(math.ceil(file_size / TARGET_PARTS), MIN_PART_SIZE), CHUNK_SIZE)
+    part_size = max(part_size, math.ceil(file_size / MAX_PARTS))
+    mib = 1024 * 1024
+    return min(math.ceil(part_size / mib) * mib, MAX_PART_SIZE)
+
+
+# Function to work out how many parts may be held in memory / in flight at once
+def get_max_in_flight_parts(part_size: int) -> int:
+    budget = S3_UPLOAD_MEMORY_BUDGET_MB * 1024 * 1024
+    return max(1, min(S3_UPLOAD_WORKERS, budget // part_size))
+
+
+# Function to read an UploadFile in part-sized chunks
+async def iter_upload_parts(file: UploadFile, part_size: int) -> AsyncIterator[bytes]:
+    await file.seek(0)
+    while True:
+        chunk = await file.read(part_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+# Function to put already-read parts back in front of the remaining stream
+async def chain_parts(head: List[bytes], rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for part in head:
+        yield part
+    async for part in rest:
+        yield part
 
 
 # Function to handle multipart uploads for large files
-async def multipart_upload_to_s3(s3_key: str, file_path: str, content_type: str) -> str:
-    upload_id = s3_client.create_multipart_upload(
+# Recorded as an upload session too, so one cut off by a crash is still aborted by the reaper.
+async def multipart_upload_to_s3(s3_key: str, parts: AsyncIterator[bytes], content_type: str, part_size: int = CHUNK_SIZE, size: int = None) -> str:
+    upload_id = (await s3_call(
+        "create_multipart_upload",
         Bucket=AWS_S3_BUCKET,
         Key=s3_key,
         ContentType=content_type
-    )["UploadId"]
+    ))["UploadId"]
+    await create_upload_session(upload_id, s3_key, content_type, size=size, part_size=part_size, source="server")
 
-    parts = []
-    part_number = 1
     try:
-        with open(file_path, "rb") as f:
-            while True:
-                chunk = f.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                response = s3_client.upload_part(
-                    Bucket=AWS_S3_BUCKET,
-                    Key=s3_key,
-                    PartNumber=part_number,
-                    UploadId=upload_id,
-                    Body=chunk
-                )
-                parts.append({
-                    "PartNumber": part_number,
-                    "ETag": response["ETag"]
-                })
-                part_number += 1
+        uploaded_parts = await upload_parts_concurrently(s3_key, upload_id, parts, part_size)
 
-        complete_response = s3_client.complete_multipart_upload(
+        complete_response = await s3_call(
+            "complete_multipart_upload",
             Bucket=AWS_S3_BUCKET,
             Key=s3_key,
             UploadId=upload_id,
-            MultipartUpload={"Parts": parts}
+            MultipartUpload={"Parts": uploaded_parts}
         )
+        await mark_upload_session(upload_id, status="completed", parts_done=len(uploaded_parts))
 
         return complete_response.get("VersionId") 
 
     except Exception as e:
-        s3_client.abort_multipart_upload(Bucket=AWS_S3_BUCKET, Key=s3_key, UploadId=upload_id)
+        await s3_call("abort_multipart_upload", Bucket=AWS_S3_BUCKET, Key=s3_key, UploadId=upload_id)
+        await mark_upload_session(upload_id, status="aborted")
         raise HTTPException(status_code=500, detail=f"Multipart upload failed: {str(e)}")
 
 
+# Function to upload parts with a bounded number in flight
+# A slot is taken before the next part is read, so at most
+# get_max_in_flight_parts(part_size) parts are buffered at any time.
+async def upload_parts_concurrently(s3_key: str, upload_id: str, parts: AsyncIterator[bytes], part_size: int) -> List[Dict[str, object]]:
+    slots = asyncio.Semaphore(get_max_in_flight_parts(part_size))
+    errors = []
+    tasks = []
+
+    def on_done(task: asyncio.Task):
+        slots.release()
+        if not task.cancelled() and task.exception():
+            errors.append(task.exception())
+
+    try:
+        part_number = 1
+        while True:
+            await slots.acquire()
+            if errors:
+                slots.release()
+                raise errors[0]
+            chunk = await anext(parts, None)
+            if chunk is None:
+                slots.release()
+                break
+            task = asyncio.create_task(upload_part_with_retry(s3_key, upload_id, part_number, chunk))
+            task.add_done_callback(on_done)
+            tasks.append(task)
+            part_number += 1
+
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+# Function to upload one part, retrying with exponential backoff and jitter
+async def upload_part_with_retry(s3_key: str, upload_id: str, part_number: int, chunk: bytes) -> Dict[str, object]:
+    for attempt in range(1, S3_UPLOAD_PART_RETRIES + 1):
+        try:
+            response = await s3_call(
+                "upload_part",
+                Bucket=AWS_S3_BUCKET,
+                Key=s3_key,
+                PartNumber=part_number,
+                UploadId=upload_id,
+                Body=chunk
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        except (BotoCoreError, ClientError):
+            if attempt == S3_UPLOAD_PART_RETRIES:
+                raise
+            delay = min(PART_RETRY_MAX_DELAY, PART_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+
+
+# Function to copy a stored version to a new filename entirely inside S3
+# No bytes pass through the app and extraction is not re-run: the source version's
+# stored metadata snapshot is reused for the copy.
+async def copy_file_version(source_filename: str, version_id: str, new_filename: str):
+    extension = os.path.splitext(new_filename)[1].lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {extension}")
+
+    source_key = await find_s3_key(source_filename)
+    s3_key = f"{S3_UPLOAD_FOLDER}{get_folder_by_extension(extension)}/{new_filename}"
+
+    try:
+        head = await s3_call("head_object", Bucket=AWS_S3_BUCKET, Key=source_key, VersionId=version_id)
+        size = head["ContentLength"]
+        content_type = head.get("ContentType", "application/octet-stream")
+
+        if size <= MAX_COPY_OBJECT_SIZE:
+            copy_response = await s3_call(
+                "copy_object",
+                Bucket=AWS_S3_BUCKET,
+                CopySource={"Bucket": AWS_S3_BUCKET, "Key": source_key, "VersionId": version_id},
+                Key=s3_key,
+                MetadataDirective="COPY"
+            )
+            new_version_id = copy_response.get("VersionId")
+        else:
+            new_version_id = await multipart_copy_to_s3(source_key, version_id, s3_key, size, content_type)
+    except (BotoCoreError, ClientError) as e:
+        raise HTTPException(status_code=500, detail=f"Copy failed: {str(e)}")
+
+    async with pg_session() as session:
+        result = await session.execute(
+            select(FileVersion.metadata_snapshot).where(FileVersion.s3_version_id == version_id).limit(1)
+        )
+        metadata = dict(result.scalar_one_or_none() or {})
+
+    await record_s3_key(new_filename, s3_key)
+
+    # The source's extraction may still be queued; give the copy its own job in that case
+    if metadata.get("metadata_status", "ready") != "ready":
+        metadata["metadata_status"] = "pending"
+        metadata["metadata_job_id"] = await enqueue_metadata_job(s3_key, new_version_id)
+
+    cdn_relative_path = s3_key.replace(f"{S3_UPLOAD_FOLDER}", "")
+    cdn_url = f"https://{CDN_DOMAIN}/{cdn_relative_path}"
+
+    metadata.update({
+        "filename": new_filename,
+        "extension": extension,
+        "content_type": content_type,
+        "size": size,
+        "s3_key": s3_key,
+        "cdn_url": cdn_url,
+        "version_id": new_version_id,
+        "status": "copied",
+        "message": "File copied in S3 successfully!"
+    })
+    return metadata
+
+
+# Function to copy an object larger than 5GB with concurrent upload_part_copy calls
+async def multipart_copy_to_s3(source_key: str, version_id: str, s3_key: str, size: int, content_type: str) -> str:
+    upload_id = (await s3_call(
+        "create_multipart_upload",
+        Bucket=AWS_S3_BUCKET,
+        Key=s3_key,
+        ContentType=content_type
+    ))["UploadId"]
+
+    part_size = choose_part_size(size)
+    # Recorded like server-side uploads, so a copy cut off by a crash is still aborted by the reaper
+    await create_upload_session(upload_id, s3_key, content_type, size=size, part_size=part_size, source="server")
+    semaphore = asyncio.Semaphore(S3_UPLOAD_WORKERS)
+
+    async def copy_part(part_number: int, start: int):
+        end = min(start + part_size, size) - 1
+        async with semaphore:
+            response = await s3_call(
+                "upload_part_copy",
+                Bucket=AWS_S3_BUCKET,
+                Key=s3_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                CopySource={"Bucket": AWS_S3_BUCKET, "Key": source_key, "VersionId": version_id},
+                CopySourceRange=f"bytes={start}-{end}"
+            )
+        return {"PartNumber": part_number, "ETag": response["CopyPartResult"]["ETag"]}
+
+    try:
+        parts = await asyncio.gather(*[
+            copy_part(part_number, start)
+            for part_number, start in enumerate(range(0, size, part_size), start=1)
+        ])
+        complete_response = await s3_call(
+            "complete_multipart_upload",
+            Bucket=AWS_S3_BUCKET,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+        await mark_upload_session(upload_id, status="completed", parts_done=len(parts))
+        return complete_response.get("VersionId")
+    except Exception:
+        await s3_call("abort_multipart_upload", Bucket=AWS_S3_BUCKET, Key=s3_key, UploadId=upload_id)
+        await mark_upload_session(upload_id, status="aborted")
+        raise
+
 
 async def save_file_metadata_to_db(data: dict):
+    file_uid = uuid.UUID(str(data["uid"])) if data.get("uid") else uuid.uuid4()
+    parent_id = uuid.UUID(str(data["parent_id"])) if data.get("parent_id") else None
+
     async with pg_session() as session:
+        # Materialized path, built the same way Django's FileObject.save() does
+        parent_path = "/"
+        if parent_id:
+            parent = await session.get(FileObject, parent_id)
+            if parent is None:
+                raise HTTPException(status_code=404, detail="Parent folder not found.")
+            parent_path = parent.path
+
         file_obj = FileObject(
-            uid=data.get("uid"),
+            uid=file_uid,
             name=data.get("filename") or data.get("name"),
             type=data.get("type", "file"),
             description=data.get("description"),
@@ -191,9 +417,9 @@ async def save_file_metadata_to_db(data: dict):
             tags=data.get("tags"),
             trashed_at=data.get("trashed_at"),
             owner_id=data.get("owner_id"),
-            parent_id=data.get("parent_id"),
+            parent_id=parent_id,
             latest_version_id=data.get("latest_version_id"),
-            storage_class=data.get("storage_class", "STANDARD") 
+            path=f"{parent_path}{file_uid}/",
         )
         session.add(file_obj)
         await session.commit()
@@ -204,7 +430,7 @@ async def save_file_metadata_to_db(data: dict):
 # Function to list all files in the S3 bucket
 async def list_files():
     try:
-        response = s3_client.list_objects_v2(Bucket=AWS_S3_BUCKET, Prefix=S3_UPLOAD_FOLDER)
+        response = await s3_call("list_objects_v2", Bucket=AWS_S3_BUCKET, Prefix=S3_UPLOAD_FOLDER)
         if "Contents" not in response:
             return []
         return [obj["Key"] for obj in response["Contents"] if not obj["Key"].endswith("/")]
@@ -214,8 +440,8 @@ async def list_files():
 # Function to list all versions of a file
 async def list_file_versions(filename: str):
     try:
-        s3_key = find_s3_key(filename)
-        response = s3_client.list_object_versions(Bucket=AWS_S3_BUCKET, Prefix=s3_key)
+        s3_key = await find_s3_key(filename)
+        response = await s3_call("list_object_versions", Bucket=AWS_S3_BUCKET, Prefix=s3_key)
 
         versions = []
         for version in response.get("Versions", []):
@@ -237,15 +463,75 @@ async def list_file_versions(filename: str):
 
 
 # Function to find the S3 key for a given filename
-def find_s3_key(filename: str) -> str:
-    response = s3_client.list_objects_v2(Bucket=AWS_S3_BUCKET, Prefix=S3_UPLOAD_FOLDER)
-    for obj in response.get("Contents", []):
-        if obj["Key"].endswith(filename):
-            return obj["Key"]
-    raise HTTPException(status_code=404, detail="File not found")
+# Resolved from the persistent key index; a bucket scan is only the fallback for
+# objects uploaded before the index existed, and its result is backfilled.
+async def find_s3_key(filename: str) -> str:
+    s3_key = await lookup_s3_key(filename)
+    if s3_key:
+        return s3_key
+
+    found = await run_s3(scan_for_s3_keys, {filename})
+    if filename not in found:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    await record_s3_key(filename, found[filename])
+    return found[filename]
+
+
+# Function to resolve many filenames at once; all index misses share one bucket listing
+async def resolve_s3_keys(filenames) -> Dict[str, str]:
+    filenames = set(filenames)
+    keys = await lookup_s3_keys(filenames)
+    misses = filenames - keys.keys()
+    if misses:
+        found = await run_s3(scan_for_s3_keys, misses)
+        await record_s3_keys(found)
+        keys.update(found)
+    return keys
+
+
+# Function to scan the upload folder once for several filenames (all pages, not just the first 1,000 keys)
+# Stops as soon as every filename has been matched; filenames never seen are left out.
+def scan_for_s3_keys(filenames) -> Dict[str, str]:
+    remaining = set(filenames)
+    found = {}
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=AWS_S3_BUCKET, Prefix=S3_UPLOAD_FOLDER):
+        for obj in page.get("Contents", []):
+            for filename in [name for name in remaining if obj["Key"].endswith(name)]:
+                found[filename] = obj["Key"]
+                remaining.discard(filename)
+            if not remaining:
+                return found
+    return found
+
+
+# Function to stream an S3 object body in fixed-size chunks without buffering it
+async def iter_s3_body(body, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+    try:
+        while True:
+            chunk = await run_s3(body.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+
+# Function to turn an If-Range validator into the matching get_object precondition
+# An ETag maps to IfMatch and an HTTP date to IfUnmodifiedSince; S3 then answers
+# PreconditionFailed when the object changed, and the full object is sent instead.
+def get_if_range_condition(if_range: str) -> Dict[str, object] | None:
+    if_range = if_range.strip()
+    if if_range.startswith(('"', "W/")):
+        return {"IfMatch": if_range}
+    try:
+        return {"IfUnmodifiedSince": parsedate_to_datetime(if_range)}
+    except (TypeError, ValueError):
+        return None
 
 
-async def get_file_response(filename: str,user_id: str,version_id: str = None, mode: str = "download", file_id: str = None):
+async def get_file_response(filename: str,user_id: str,version_id: str = None, mode: str = "download", file_id: str = None, range_header: str = None, if_range: str = None):
     try:
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID required to access the file.")
@@ -262,7 +548,7 @@ async def get_file_response(filename: str,user_id: str,version_id: str = None, m
         #     raise HTTPException(status_code=403, detail="You do not have permission to view this file.") # This line is removed as per the edit hint
         
         # Directly stream from S3
-        s3_key = find_s3_key(filename)
+        s3_key = await find_s3_key(filename)
         get_object_args = {
             "Bucket": AWS_S3_BUCKET,
             "Key": s3_key
@@ -270,10 +556,34 @@ async def get_file_response(filename: str,user_id: str,version_id: str = None, m
         if version_id:
             get_object_args["VersionId"] = version_id
 
+        # Pass byte ranges straight through to S3
+        range_args = {}
+        if range_header:
+            range_args["Range"] = range_header
+            if if_range:
+                condition = get_if_range_condition(if_range)
+                # An unparseable validator means the range can't be honoured
+                if condition is None:
+                    range_args = {}
+                else:
+                    range_args.update(condition)
+
         # Run blocking boto3 call in thread
-        s3_object = await asyncio.to_thread(s3_client.get_object, **get_object_args)
-        file_data = await asyncio.to_thread(lambda: s3_object["Body"].read())
-        file_stream = BytesIO(file_data)
+        try:
+            s3_object = await s3_call("get_object", **get_object_args, **range_args)
+        except ClientError as e:
+            error = e.response.get("Error", {})
+            if error.get("Code") == "PreconditionFailed" and range_args:
+                s3_object = await s3_call("get_object", **get_object_args)
+            elif error.get("Code") == "InvalidRange":
+                raise HTTPException(
+                    status_code=416,
+                    detail="Requested range not satisfiable",
+                    headers={"Content-Range": f"bytes */{error.get('ActualObjectSize', '*')}"}
+                )
+            else:
+                raise
+
         content_type = s3_object.get("ContentType", "application/octet-stream")
 
         if mode == "view" or (mode == "auto" and content_type in INLINE_MIME_TYPES):
@@ -281,10 +591,26 @@ async def get_file_response(filename: str,user_id: str,version_id: str = None, m
         else:
             disposition = f'attachment; filename="{filename}"'
 
+        headers = {
+            "Content-Disposition": disposition,
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(s3_object["ContentLength"]),
+        }
+        if s3_object.get("ETag"):
+            headers["ETag"] = s3_object["ETag"]
+        if s3_object.get("LastModified"):
+            headers["Last-Modified"] = format_datetime(s3_object["LastModified"].astimezone(datetime.timezone.utc), usegmt=True)
+
+        status_code = 200
+        if s3_object.get("ContentRange"):
+            status_code = 206
+            headers["Content-Range"] = s3_object["ContentRange"]
+
         return StreamingResponse(
-            file_stream,
+            iter_s3_body(s3_object["Body"]),
+            status_code=status_code,
             media_type=content_type,
-            headers={"Content-Disposition": disposition}
+            headers=headers
         )
 
     except HTTPException:
@@ -293,6 +619,53 @@ async def get_file_response(filename: str,user_id: str,version_id: str = None, m
         raise HTTPException(status_code=404, detail=f"Download error: {str(e)}")
 
 
+# Function to build a Content-Disposition header that survives non-ASCII filenames
+def build_content_disposition(disposition_type: str, filename: str) -> str:
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "")
+    return f"{disposition_type}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+# Function to hand out a short-lived presigned GET URL instead of proxying the bytes
+# The version, content type and Content-Disposition are signed into the URL so the
+# client downloads straight from S3 with the same headers the streaming path sends.
+async def get_presigned_download_url(filename: str, user_id: str, version_id: str = None, mode: str = "download", download_name: str = None, expires_in: int = PRESIGNED_DOWNLOAD_EXPIRY):
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID required to access the file.")
+
+    s3_key = await find_s3_key(filename)
+    head_args = {"Bucket": AWS_S3_BUCKET, "Key": s3_key}
+    if version_id:
+        head_args["VersionId"] = version_id
+
+    try:
+        head = await s3_call("head_object", **head_args)
+    except ClientError as e:
+        raise HTTPException(status_code=404, detail=f"Download error: {str(e)}")
+
+    content_type = head.get("ContentType", "application/octet-stream")
+    if mode == "view" or (mode == "auto" and content_type in INLINE_MIME_TYPES):
+        disposition_type = "inline"
+    else:
+        disposition_type = "attachment"
+
+    params = dict(head_args)
+    params["ResponseContentType"] = content_type
+    params["ResponseContentDisposition"] = build_content_disposition(disposition_type, download_name or filename)
+
+    try:
+        url = s3_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+    except (BotoCoreError, ClientError) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate download URL: {str(e)}")
+
+    return {
+        "url": url,
+        "expires_in": expires_in,
+        "version_id": head.get("VersionId", version_id),
+        "content_type": content_type,
+        "size": head.get("ContentLength"),
+    }
+
+
 async def rename_existing_file(old_filename: str, new_filename: str, user_id: str,file_id: str = None):
     try:
         file_id = file_id or old_filename.split("_")[0] 
@@ -302,25 +675,28 @@ async def rename_existing_file(old_filename: str, new_filename: str, user_id: st
         # if not is_admin and (not permission or permission not in [ PermissionEnum.write, PermissionEnum.owner]): # This line is removed as per the edit hint
         #     raise HTTPException(status_code=403, detail="You do not have permission to view this file.") # This line is removed as per the edit hint
 
-        old_key = find_s3_key(old_filename)
+        old_key = await find_s3_key(old_filename)
         old_extension = os.path.splitext(old_filename)[1]
         new_filename = os.path.splitext(new_filename)[0] + old_extension
         folder = os.path.dirname(old_key).replace(S3_UPLOAD_FOLDER, "")
         new_key = f"{S3_UPLOAD_FOLDER}{folder}/{new_filename}"
 
-        # Use asyncio.to_thread for blocking operations
-        await asyncio.to_thread(
-            s3_client.copy_object,
+        # Blocking boto3 calls run on the shared S3 executor
+        await s3_call(
+            "copy_object",
             Bucket=AWS_S3_BUCKET,
             CopySource={"Bucket": AWS_S3_BUCKET, "Key": old_key},
             Key=new_key
         )
-        await asyncio.to_thread(
-            s3_client.delete_object,
+        await s3_call(
+            "delete_object",
             Bucket=AWS_S3_BUCKET,
             Key=old_key
         )
 
+        await forget_s3_key(old_filename)
+        await record_s3_key(new_filename, new_key)
+
         return {
             "message": "File renamed successfully!",
             "old_filename": old_filename,
@@ -330,93 +706,110 @@ async def rename_existing_file(old_filename: str, new_filename: str, user_id: st
         raise HTTPException(status_code=500, detail=f"Rename failed: {str(e)}")
 
 
-async def delete_single_file(file_entry: Dict[str, str], semaphore: asyncio.Semaphore) -> Dict[str, any]:
-    """Delete a single file version with semaphore control"""
+async def delete_version_batch(batch: List[Dict[str, str]], semaphore: asyncio.Semaphore) -> List[Dict[str, any]]:
+    """Delete up to 1,000 key versions with one DeleteObjects call"""
     async with semaphore:
-        filename = file_entry.get("filename")
-        version_id = file_entry.get("version_id")
-
-        if not filename or not version_id:
-            return {
-                "filename": filename,
-                "error": "Both filename and version_id are required"
+        response = await s3_call(
+            "delete_objects",
+            Bucket=AWS_S3_BUCKET,
+            Delete={
+                "Objects": [{"Key": item["key"], "VersionId": item["version_id"]} for item in batch],
+                "Quiet": False
             }
+        )
 
-        try:
-            key = find_s3_key(filename)
-
-            # Validate the version exists
-            response = await asyncio.to_thread(
-                s3_client.list_object_versions,
-                Bucket=AWS_S3_BUCKET,
-                Prefix=key
-            )
-
-            valid_version = any(
-                v["VersionId"] == version_id and v["Key"] == key
-                for v in response.get("Versions", [])
-            )
+    deleted = {(d["Key"], d.get("VersionId")) for d in response.get("Deleted", [])}
+    failed = {(e["Key"], e.get("VersionId")): e for e in response.get("Errors", [])}
 
-            if not valid_version:
-                return {
-                    "filename": filename,
-                    "version_id": version_id,
-                    "error": "Version not found"
-                }
+    results = []
+    for item in batch:
+        result = {"filename": item["filename"], "version_id": item["version_id"]}
+        error = failed.get((item["key"], item["version_id"]))
+        if error:
+            if error.get("Code") == "NoSuchVersion":
+                result["error"] = "Version not found"
+            else:
+                result["error"] = f"{error.get('Code')}: {error.get('Message')}"
+        elif (item["key"], item["version_id"]) in deleted:
+            result["status"] = "deleted"
+        else:
+            result["error"] = "No result returned for this version"
+        results.append(result)
+    return results
 
-            # Delete the specific version
-            await asyncio.to_thread(
-                s3_client.delete_object,
-                Bucket=AWS_S3_BUCKET,
-                Key=key,
-                VersionId=version_id
-            )
 
-            return {
-                "filename": filename,
-                "version_id": version_id,
-                "status": "deleted"
-            }
+# Function to check whether any version (or delete marker) of a key is left
+async def key_has_no_versions(key: str, semaphore: asyncio.Semaphore) -> bool:
+    async with semaphore:
+        # The key sorts before any longer key sharing its prefix, so one page is enough
+        response = await s3_call("list_object_versions", Bucket=AWS_S3_BUCKET, Prefix=key, MaxKeys=1000)
+    entries = response.get("Versions", []) + response.get("DeleteMarkers", [])
+    return not any(entry["Key"] == key for entry in entries)
 
-        except Exception as e:
-            return {
-                "filename": filename,
-                "version_id": version_id,
-                "error": str(e)
-            }
 
 async def delete_files_by_name(file_list: List[Dict[str, str]], max_concurrent: int = 10):
-    """Delete files with semaphore-based concurrency control"""
+    """Delete file versions in DeleteObjects batches, keys resolved from the key index"""
     if not file_list:
         return {"deleted": [], "errors": []}
-    
-    # Create semaphore to limit concurrent operations
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    # Create tasks for all files
-    tasks = [delete_single_file(file_entry, semaphore) for file_entry in file_list]
-    
-    # Execute all tasks concurrently with semaphore control
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Process results
+
     deleted = []
     errors = []
-    
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            # Handle unexpected exceptions
-            filename = file_list[i].get("filename", "unknown")
-            version_id = file_list[i].get("version_id", "unknown")
+
+    keys = await resolve_s3_keys(
+        entry.get("filename") for entry in file_list
+        if entry.get("filename") and entry.get("version_id")
+    )
+
+    to_delete = []
+    for file_entry in file_list:
+        filename = file_entry.get("filename")
+        version_id = file_entry.get("version_id")
+        if not filename or not version_id:
+            errors.append({
+                "filename": filename,
+                "error": "Both filename and version_id are required"
+            })
+        elif filename not in keys:
             errors.append({
                 "filename": filename,
                 "version_id": version_id,
-                "error": f"Unexpected error: {str(result)}"
+                "error": "File not found"
             })
-        elif "error" in result:
-            errors.append(result)
         else:
-            deleted.append(result)
+            to_delete.append({"filename": filename, "key": keys[filename], "version_id": version_id})
+
+    # Create semaphore to limit concurrent DeleteObjects calls
+    semaphore = asyncio.Semaphore(max_concurrent)
+    batches = [to_delete[i:i + DELETE_BATCH_SIZE] for i in range(0, len(to_delete), DELETE_BATCH_SIZE)]
+    batch_results = await asyncio.gather(
+        *[delete_version_batch(batch, semaphore) for batch in batches],
+        return_exceptions=True
+    )
+
+    # Process results
+    for batch, results in zip(batches, batch_results):
+        if isinstance(results, Exception):
+            # Handle unexpected exceptions for the whole batch
+            errors.extend({
+                "filename": item["filename"],
+                "version_id": item["version_id"],
+                "error": f"Unexpected error: {str(results)}"
+            } for item in batch)
+            continue
+        for result in results:
+            if "error" in result:
+                errors.append(result)
+            else:
+                deleted.append(result)
+
+    # Keys whose last version just went have to leave the filename -> key index too
+    touched = {item["filename"]: keys[item["filename"]] for item in deleted}
+    emptied = await asyncio.gather(*[
+        key_has_no_versions(key, semaphore) for key in touched.values()
+    ], return_exceptions=True)
+    for filename, is_empty in zip(touched, emptied):
+        if is_empty is True:
+            await forget_s3_key(filename)
 
     return {
         "deleted": deleted,
@@ -429,6 +822,29 @@ async def delete_files_by_name(file_list: List[Dict[str, str]], max_concurrent:
     }
 
 
+# Function to move one object version to Glacier IR: server-side copy, then drop the original
+async def move_version_to_glacier(key: str, version_id: str) -> str:
+    copy_response = await s3_call(
+        "copy_object",
+        Bucket=AWS_S3_BUCKET,
+        CopySource={
+            "Bucket": AWS_S3_BUCKET,
+            "Key": key,
+            "VersionId": version_id
+        },
+        Key=key,
+        StorageClass="GLACIER_IR",
+        MetadataDirective="COPY"
+    )
+    await s3_call(
+        "delete_object",
+        Bucket=AWS_S3_BUCKET,
+        Key=key,
+        VersionId=version_id
+    )
+    return copy_response["VersionId"]
+
+
 async def archive_single_file(file_entry: Dict[str, str], semaphore: asyncio.Semaphore) -> Dict[str, any]:
     """Archive a single file to Glacier with semaphore control"""
     async with semaphore:
@@ -442,33 +858,12 @@ async def archive_single_file(file_entry: Dict[str, str], semaphore: asyncio.Sem
             }
 
         try:
-            key = find_s3_key(filename)
+            key = await find_s3_key(filename)
 
-            # Step 1: Copy to Glacier_IR
-            copy_response = await asyncio.to_thread(
-                s3_client.copy_object,
-                Bucket=AWS_S3_BUCKET,
-                CopySource={
-                    "Bucket": AWS_S3_BUCKET,
-                    "Key": key,
-                    "VersionId": version_id
-                },
-                Key=key,
-                StorageClass="GLACIER_IR",
-                MetadataDirective="COPY"
-            )
-
-            new_version_id = copy_response["VersionId"]
-
-            # Step 2: Delete original version
-            await asyncio.to_thread(
-                s3_client.delete_object,
-                Bucket=AWS_S3_BUCKET,
-                Key=key,
-                VersionId=version_id
-            )
+            # Step 1: Copy to Glacier_IR and delete the original version
+            new_version_id = await move_version_to_glacier(key, version_id)
 
-            # Step 3: Get file_id from DB
+            # Step 2: Get file_id from DB
             async with pg_session() as session:
                 result = await session.execute(
                     select(FileVersion.file_id).where(FileVersion.s3_version_id == version_id)
@@ -538,6 +933,111 @@ async def archive_files_to_glacier(file_list: List[Dict[str, str]], max_concurre
             "failed_archives": len(errors)
         }
     }
+
+
+async def transition_to_glacier(item: Dict[str, str], semaphore: asyncio.Semaphore) -> Dict[str, any]:
+    """Move one version to Glacier IR with a server-side copy, then drop the original version"""
+    async with semaphore:
+        try:
+            new_version_id = await move_version_to_glacier(item["key"], item["version_id"])
+        except Exception as e:
+            return {
+                "file_uid": item["file_uid"],
+                "filename": item["filename"],
+                "version_id": item["version_id"],
+                "error": str(e)
+            }
+
+    return {
+        "file_uid": item["file_uid"],
+        "filename": item["filename"],
+        "old_version_id": item["version_id"],
+        "new_version_id": new_version_id,
+        "status": "trashed"
+    }
+
+
+async def trash_files_bulk(file_list: List[Dict[str, str]], max_concurrent: int = S3_TRASH_CONCURRENCY):
+    """Trash latest versions to Glacier IR concurrently, streaming one NDJSON line per file"""
+    errors = []
+    candidates = []
+    for file_entry in file_list:
+        filename = file_entry.get("filename")
+        version_id = file_entry.get("latest_version_id")
+        if not filename or not version_id:
+            errors.append({
+                "file_uid": file_entry.get("file_uid"),
+                "filename": filename,
+                "error": "Both filename and latest_version_id are required"
+            })
+        else:
+            candidates.append(file_entry)
+
+    # One key index query and one FileVersion query for the whole request
+    keys = await resolve_s3_keys(entry["filename"] for entry in candidates)
+    async with pg_session() as session:
+        result = await session.execute(
+            select(FileVersion.s3_version_id, FileVersion.file_id).where(
+                FileVersion.s3_version_id.in_([entry["latest_version_id"] for entry in candidates])
+            )
+        )
+        version_files = {version_id: str(file_id) for version_id, file_id in result.all()}
+
+    items = []
+    for file_entry in candidates:
+        filename = file_entry["filename"]
+        version_id = file_entry["latest_version_id"]
+        requested_uid = file_entry.get("file_uid")
+        file_uid = version_files.get(version_id)
+
+        error = None
+        if filename not in keys:
+            error = "File not found"
+        elif not file_uid or (requested_uid and requested_uid != file_uid):
+            error = "File ID not found for given version ID"
+
+        if error:
+            errors.append({
+                "file_uid": requested_uid,
+                "filename": filename,
+                "version_id": version_id,
+                "error": error
+            })
+        else:
+            items.append({
+                "file_uid": file_uid,
+                "filename": filename,
+                "key": keys[filename],
+                "version_id": version_id
+            })
+
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def progress():
+        for error in errors:
+            yield json.dumps(error) + "\n"
+
+        trashed = 0
+        failed = len(errors)
+        for next_result in asyncio.as_completed([transition_to_glacier(item, semaphore) for item in items]):
+            result = await next_result
+            if "error" in result:
+                failed += 1
+            else:
+                trashed += 1
+            yield json.dumps(result) + "\n"
+
+        yield json.dumps({
+            "summary": {
+                "total_requested": len(file_list),
+                "successful_trashes": trashed,
+                "failed_trashes": failed
+            }
+        }) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
 async def restore_single_file(file_entry: Dict[str, str], semaphore: asyncio.Semaphore) -> Dict[str, any]:
     """Restore a single file from Glacier Instant Retrieval with semaphore control"""
     async with semaphore:
@@ -551,12 +1051,12 @@ async def restore_single_file(file_entry: Dict[str, str], semaphore: asyncio.Sem
             }
 
         try:
-            key = find_s3_key(filename)
+            key = await find_s3_key(filename)
 
             # Check if the object exists and is in Glacier IR
             try:
-                head_response = await asyncio.to_thread(
-                    s3_client.head_object,
+                head_response = await s3_call(
+                    "head_object",
                     Bucket=AWS_S3_BUCKET,
                     Key=key,
                     VersionId=version_id
@@ -575,8 +1075,8 @@ async def restore_single_file(file_entry: Dict[str, str], semaphore: asyncio.Sem
                     }
 
                 # For Glacier IR, files are instantly accessible - restore to Standard
-                copy_response = await asyncio.to_thread(
-                    s3_client.copy_object,
+                copy_response = await s3_call(
+                    "copy_object",
                     Bucket=AWS_S3_BUCKET,
                     CopySource={
                         "Bucket": AWS_S3_BUCKET,
@@ -591,8 +1091,8 @@ async def restore_single_file(file_entry: Dict[str, str], semaphore: asyncio.Sem
                 new_version_id = copy_response["VersionId"]
 
                 # Delete the Glacier IR version
-                await asyncio.to_thread(
-                    s3_client.delete_object,
+                await s3_call(
+                    "delete_object",
                     Bucket=AWS_S3_BUCKET,
                     Key=key,
                     VersionId=version_id
@@ -716,7 +1216,7 @@ async def list_s3_delete_markers(prefix: str = None):
             kwargs['Prefix'] = prefix
         delete_markers = []
         while True:
-            response = s3_client.list_object_versions(**kwargs)
+            response = await s3_call("list_object_versions", **kwargs)
             for marker in response.get('DeleteMarkers', []):
                 delete_markers.append({
                     'key': marker['Key'],
@@ -739,7 +1239,7 @@ async def restore_s3_file_from_delete_marker(key: str, version_id: str):
     """
     try:
         # Check if the key exists as a delete marker
-        response = s3_client.list_object_versions(Bucket=AWS_S3_BUCKET, Prefix=key)
+        response = await s3_call("list_object_versions", Bucket=AWS_S3_BUCKET, Prefix=key)
         found = False
         for marker in response.get('DeleteMarkers', []):
             if marker['Key'] == key and marker['VersionId'] == version_id:
@@ -748,11 +1248,11 @@ async def restore_s3_file_from_delete_marker(key: str, version_id: str):
         if not found:
             raise HTTPException(status_code=404, detail=f"Delete marker not found for key: {key} and version_id: {version_id}")
         # Remove the delete marker
-        del_response = s3_client.delete_object(Bucket=AWS_S3_BUCKET, Key=key, VersionId=version_id)
+        del_response = await s3_call("delete_object", Bucket=AWS_S3_BUCKET, Key=key, VersionId=version_id)
         # Log the response for debugging
         print(f"Delete marker removal response: {del_response}")
         # Double-check if the delete marker is gone
-        post_response = s3_client.list_object_versions(Bucket=AWS_S3_BUCKET, Prefix=key)
+        post_response = await s3_call("list_object_versions", Bucket=AWS_S3_BUCKET, Prefix=key)
         still_exists = any(m['Key'] == key and m['VersionId'] == version_id for m in post_response.get('DeleteMarkers', []))
         if still_exists:
             raise HTTPException(status_code=500, detail=f"Delete marker was not removed. S3 response: {del_response}")
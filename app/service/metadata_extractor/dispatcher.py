@@ -1,4 +1,13 @@
 import os
+import signal
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.core.config import (
+    METADATA_WORKERS, METADATA_MAX_TASKS_PER_CHILD, METADATA_MEMORY_LIMIT_MB, METADATA_DEFAULT_TIMEOUT
+)
+from .common import get_basic_metadata
 from .pdf import extract_pdf_metadata
 from .image import extract_image_metadata
 from .excel_csv import extract_excel_or_csv_metadata
@@ -29,4 +38,123 @@ def extract_metadata(file_path: str):
     elif ext == ".txt":
         return extract_text_metadata(file_path)
     else:
-        return {"error": f"Unsupported file type: {ext}"}  
\ No newline at end of file
+        return {"error": f"Unsupported file type: {ext}"}
+
+
+# Seconds an extractor may run for each file type before it is abandoned
+EXTRACTION_TIMEOUTS = {
+    ".pdf": 30, ".docx": 20,
+    ".csv": 60, ".xlsx": 60,
+    ".jpg": 15, ".jpeg": 15, ".png": 15, ".svg": 15, ".gif": 15,
+    ".mp3": 15, ".wav": 15,
+    ".mp4": 60, ".mkv": 60,
+    ".zip": 30, ".tar": 30, ".gz": 30, ".tgz": 30,
+    ".txt": 30,
+}
+
+# Extra time the event loop waits past the in-worker alarm before killing the pool
+TIMEOUT_GRACE = 5
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+# Function run once in every pool worker: cap its address space so one huge file
+# raises MemoryError in that worker instead of exhausting the host
+def _init_worker(memory_limit_mb: int):
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("Metadata extraction timed out")
+
+
+# Function executed inside a pool worker
+# SIGALRM interrupts extractors stuck in Python code; the outer wait_for catches the rest.
+def _extract_in_worker(file_path: str, timeout: int):
+    use_alarm = hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(timeout)
+    try:
+        return extract_metadata(file_path)
+    except (ExtractionTimeout, MemoryError) as e:
+        return _failed_metadata(file_path, str(e) or type(e).__name__)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+
+def _failed_metadata(file_path: str, error: str):
+    metadata = get_basic_metadata(file_path)
+    metadata["error"] = error
+    return metadata
+
+
+_pool = None
+
+
+# Function to get the shared extraction pool, creating it on first use
+# Spawned (not forked) workers don't inherit the event loop, DB pools or S3 client,
+# and are replaced after METADATA_MAX_TASKS_PER_CHILD files to shed leaked memory.
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=METADATA_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(METADATA_MEMORY_LIMIT_MB,),
+            max_tasks_per_child=METADATA_MAX_TASKS_PER_CHILD,
+        )
+    return _pool
+
+
+# Function to throw away a pool whose worker is stuck or dead
+# shutdown() alone would wait on a hung worker forever, so its processes are killed outright.
+def _recycle_pool(pool: ProcessPoolExecutor):
+    global _pool
+    if _pool is pool:
+        _pool = None
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+
+
+# Function to stop the extraction pool when the app shuts down
+def shutdown_metadata_pool():
+    if _pool is not None:
+        _recycle_pool(_pool)
+
+
+# Function to extract metadata in the process pool without blocking the event loop
+# A file that times out or crashes its worker gets basic metadata plus an "error" entry.
+async def extract_metadata_async(file_path: str):
+    ext = os.path.splitext(file_path)[1].lower()
+    timeout = EXTRACTION_TIMEOUTS.get(ext, METADATA_DEFAULT_TIMEOUT)
+    loop = asyncio.get_running_loop()
+
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool, _extract_in_worker, file_path, timeout),
+                timeout + TIMEOUT_GRACE
+            )
+        except asyncio.TimeoutError:
+            _recycle_pool(pool)
+            return _failed_metadata(file_path, "Metadata extraction timed out")
+        except BrokenProcessPool:
+            # Either this file took its worker down, or another call recycled the pool
+            # while this one was queued on it; only the latter is worth one retry.
+            recycled_elsewhere = pool is not _pool
+            _recycle_pool(pool)
+            if not recycled_elsewhere or attempt:
+                return _failed_metadata(file_path, "Metadata extraction worker crashed")
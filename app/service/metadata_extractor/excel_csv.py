@@ -1,21 +1,67 @@
-import pandas as pd
+import csv
+from openpyxl import load_workbook
 from .common import get_basic_metadata
 
 
 # Function to extract metadata from Excel and CSV files
-# This function reads the file, extracts basic metadata, and includes information specific to the file type like columns, rows, and sheet names for Excel files.
+# This function reads only what it needs (the header row and a streamed row count), so memory stays flat however large the file is. Excel files also report their sheet names.
 
 def extract_excel_or_csv_metadata(file_path):
     metadata = get_basic_metadata(file_path)
     try:
         ext = file_path.split('.')[-1].lower()
-        df = pd.read_excel(file_path) if ext in ['xlsx', 'xls'] else pd.read_csv(file_path)
-        metadata.update({
-            "type": "spreadsheet",
-            "rows": len(df),
-            "columns": len(df.columns),
-            "column_names": df.columns.tolist()
-        })
+        if ext == 'xlsx':
+            metadata.update(read_xlsx_summary(file_path))
+        else:
+            metadata.update(read_csv_summary(file_path))
+        metadata["type"] = "spreadsheet"
     except Exception as e:
         metadata["error"] = str(e)
-    return metadata
\ No newline at end of file
+    return metadata
+
+
+# Function to read the header and count data rows of a CSV one record at a time
+# csv.reader keeps quoted newlines inside a record; blank lines are skipped like pandas does.
+def read_csv_summary(file_path):
+    with open(file_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next((row for row in reader if row), [])
+        rows = sum(1 for row in reader if row)
+    return {
+        "rows": rows,
+        "columns": len(header),
+        "column_names": column_names(header),
+    }
+
+
+# Function to read the first sheet's header and size from an XLSX in read-only mode
+# The row count comes from the sheet's stored dimension; rows are only streamed when it is missing.
+def read_xlsx_summary(file_path):
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header = list(next(sheet.iter_rows(max_row=1, values_only=True), ()))
+        while header and header[-1] is None:
+            header.pop()
+
+        max_row = sheet.max_row
+        if max_row is None:
+            sheet.reset_dimensions()
+            max_row = sum(1 for _ in sheet.iter_rows(values_only=True))
+
+        return {
+            "rows": max(max_row - 1, 0) if header else 0,
+            "columns": len(header),
+            "column_names": column_names(header),
+            "sheet_names": workbook.sheetnames,
+        }
+    finally:
+        workbook.close()
+
+
+# Function to name header cells the way pandas would, so stored metadata keeps its shape
+def column_names(header):
+    return [
+        str(name) if name not in (None, "") else f"Unnamed: {index}"
+        for index, name in enumerate(header)
+    ]
@@ -1,23 +1,71 @@
-import chardet
+import codecs
+from chardet.universaldetector import UniversalDetector
 from .common import get_basic_metadata
 
+# Bytes read per step, both while sampling for the encoding and while counting words
+READ_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Stop feeding the encoding detector after this much input even if it isn't confident yet
+DETECT_SAMPLE_SIZE = 4 * 1024 * 1024  # 4MB
+
+PREVIEW_LENGTH = 100
+
 
 # Function to extract metadata from text files
-# This function reads the text file, extracts basic metadata, and includes text-specific information like encoding,word count, and a preview of the content.
+# This function samples the start of the file to detect its encoding, then decodes and counts words chunk by chunk, so memory stays bounded and the file is read at most twice.
 
 def extract_text_metadata(file_path):
     metadata = get_basic_metadata(file_path)
     try:
-        with open(file_path, 'rb') as f:
-            raw = f.read()
-            encoding = chardet.detect(raw)['encoding']
-            text = raw.decode(encoding)
-            metadata.update({
-                "type": "text",
-                "encoding": encoding,
-                "word_count": len(text.split()),
-                "preview": text[:100]
-            })
+        encoding = detect_encoding(file_path)
+        word_count, preview = count_words(file_path, encoding)
+        metadata.update({
+            "type": "text",
+            "encoding": encoding,
+            "word_count": word_count,
+            "preview": preview
+        })
     except Exception as e:
         metadata["error"] = str(e)
-    return metadata
\ No newline at end of file
+    return metadata
+
+
+# Function to detect a file's encoding, stopping as soon as chardet is confident
+def detect_encoding(file_path):
+    detector = UniversalDetector()
+    read = 0
+    with open(file_path, 'rb') as f:
+        while not detector.done and read < DETECT_SAMPLE_SIZE:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            detector.feed(chunk)
+            read += len(chunk)
+    detector.close()
+    return detector.result.get('encoding') or 'utf-8'
+
+
+# Function to decode a file incrementally and count whitespace-separated words
+# A word split across two chunks is counted once. Returns (word_count, preview).
+def count_words(file_path, encoding):
+    # A sample that looked like ASCII may still hold UTF-8 further on; UTF-8 decodes both
+    decode_as = 'utf-8' if encoding.lower() == 'ascii' else encoding
+    decoder = codecs.getincrementaldecoder(decode_as)(errors='replace')
+
+    word_count = 0
+    preview = ""
+    in_word = False
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                if len(preview) < PREVIEW_LENGTH:
+                    preview += text[:PREVIEW_LENGTH - len(preview)]
+                word_count += len(text.split())
+                if in_word and not text[0].isspace():
+                    word_count -= 1
+                in_word = not text[-1].isspace()
+            if not chunk:
+                break
+    return word_count, preview
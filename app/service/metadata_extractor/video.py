@@ -1,35 +1,403 @@
-from moviepy import VideoFileClip
+import os
+import json
+import shutil
+import struct
+import subprocess
 from .common import get_basic_metadata
 
+# Bytes fetched per read; header probing touches only a handful of blocks
+PROBE_BLOCK_SIZE = 64 * 1024  # 64KB
+
+# Refuse to load a moov atom larger than this (it holds sample tables, not media)
+MAX_MOOV_SIZE = 64 * 1024 * 1024  # 64MB
+
+# Matroska stops being worth scanning past this many bytes of the segment without Info/Tracks
+MAX_EBML_SCAN = 16 * 1024 * 1024  # 16MB
+
+FFPROBE_TIMEOUT = 20  # seconds
+
 
 # Function to extract metadata from video files
-# This function reads the video file, extracts basic metadata, and includes video-specific information like duration, fps, and resolution.
+# This function reads only the container header (the MP4 moov atom or the Matroska EBML header) for duration, fps and resolution, and falls back to a single ffprobe call when the header can't be parsed. No frames are decoded.
 
 def extract_video_metadata(file_path):
     metadata = get_basic_metadata(file_path)
-    clip = None
     try:
-        clip = VideoFileClip(file_path)
-        metadata.update({
-            "type": "video",
-            "duration": clip.duration,
-            "fps": clip.fps,
-            "width": clip.w,
-            "height": clip.h,
-            "resolution": f"{clip.w}x{clip.h}",
-        })
+        with open(file_path, "rb") as f:
+            def fetch(offset, length):
+                f.seek(offset)
+                return f.read(length)
+
+            try:
+                info = probe_video(fetch, os.path.getsize(file_path), os.path.splitext(file_path)[1].lower())
+            except Exception:
+                # Truncated or malformed header: let ffprobe have a go before giving up
+                info = None
+        if info is None:
+            info = ffprobe_video(file_path)
+        metadata.update(info)
     except Exception as e:
         metadata["error"] = str(e)
-    finally:
-        if clip:
-            # Safely close video reader
-            if hasattr(clip, "reader") and clip.reader:
-                clip.reader.close()
-            # Safely close audio reader if available
-            if clip.audio and hasattr(clip.audio, "reader") and hasattr(clip.audio.reader, "close"):
-                try:
-                    clip.audio.reader.close()
-                except Exception:
-                    pass  # Ignore if already closed or not implemented
-            clip.close()
-    return metadata
\ No newline at end of file
+    return metadata
+
+
+class RangeReader:
+    """Reads a file through `fetch(offset, length)` in cached blocks, so the same code can
+    probe a local file or an S3 object fetched with ranged GETs."""
+
+    def __init__(self, fetch, size, block_size=PROBE_BLOCK_SIZE):
+        self.fetch = fetch
+        self.size = size
+        self.block_size = block_size
+        self._blocks = {}
+
+    def read(self, offset, length):
+        length = max(0, min(length, self.size - offset))
+        if length > self.block_size:
+            return self.fetch(offset, length)
+
+        first, last = offset // self.block_size, (offset + length - 1) // self.block_size
+        data = b"".join(self._block(index) for index in range(first, last + 1))
+        start = offset - first * self.block_size
+        return data[start:start + length]
+
+    def _block(self, index):
+        if index not in self._blocks:
+            offset = index * self.block_size
+            self._blocks[index] = self.fetch(offset, min(self.block_size, self.size - offset))
+        return self._blocks[index]
+
+
+# Function to probe a video container from its header
+# Returns None when the container isn't recognised or lacks the needed boxes/elements.
+def probe_video(fetch, size, ext=None):
+    reader = RangeReader(fetch, size)
+    magic = reader.read(0, 12)
+    if magic[:4] == b"\x1a\x45\xdf\xa3":
+        return probe_matroska(reader)
+    if magic[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+        return probe_mp4(reader)
+    return None
+
+
+def video_info(container, duration, fps, width, height, video_codec=None, audio_codec=None):
+    info = {
+        "type": "video",
+        "container": container,
+        "duration": round(duration, 3) if duration is not None else None,
+        "fps": round(fps, 3) if fps else None,
+        "width": width,
+        "height": height,
+        "resolution": f"{width}x{height}" if width and height else None,
+    }
+    if video_codec:
+        info["video_codec"] = video_codec
+    if audio_codec:
+        info["audio_codec"] = audio_codec
+    return info
+
+
+# ---- MP4 / ISO BMFF ----
+
+def iter_boxes(data, start=0, end=None):
+    """Yield (type, payload_start, payload_end) for the boxes laid out in data[start:end]."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        box_size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif box_size == 0:
+            box_size = end - offset
+        if box_size < header:
+            return
+        yield box_type, offset + header, min(offset + box_size, end)
+        offset += box_size
+
+
+def find_box(data, path, start=0, end=None):
+    for box_type, payload_start, payload_end in iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload_start, payload_end
+            return find_box(data, path[1:], payload_start, payload_end)
+    return None
+
+
+def read_moov(reader):
+    # Walk top-level box headers only; mdat is skipped without being read
+    offset = 0
+    while offset + 8 <= reader.size:
+        header = reader.read(offset, 16)
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = reader.size - offset
+        if box_size < header_size:
+            return None
+        if box_type == b"moov":
+            if box_size > MAX_MOOV_SIZE:
+                return None
+            return reader.read(offset + header_size, box_size - header_size)
+        offset += box_size
+    return None
+
+
+def read_media_duration(data, start):
+    # Shared layout of mvhd and mdhd: version, flags, times, timescale, duration
+    version = data[start]
+    if version == 1:
+        timescale, duration = struct.unpack(">IQ", data[start + 20:start + 32])
+    else:
+        timescale, duration = struct.unpack(">II", data[start + 12:start + 20])
+    return timescale, duration
+
+
+def probe_mp4(reader):
+    moov = read_moov(reader)
+    if moov is None:
+        return None
+
+    mvhd = find_box(moov, [b"mvhd"])
+    duration = None
+    if mvhd:
+        timescale, units = read_media_duration(moov, mvhd[0])
+        duration = units / timescale if timescale else None
+
+    fps = width = height = video_codec = audio_codec = None
+    for box_type, trak_start, trak_end in iter_boxes(moov):
+        if box_type != b"trak":
+            continue
+        hdlr = find_box(moov, [b"mdia", b"hdlr"], trak_start, trak_end)
+        handler = moov[hdlr[0] + 8:hdlr[0] + 12] if hdlr else b""
+        stsd = find_box(moov, [b"mdia", b"minf", b"stbl", b"stsd"], trak_start, trak_end)
+        codec = moov[stsd[0] + 12:stsd[0] + 16].decode("latin-1") if stsd else None
+
+        if handler == b"soun" and audio_codec is None:
+            audio_codec = codec
+        elif handler == b"vide" and video_codec is None:
+            video_codec = codec
+            tkhd = find_box(moov, [b"tkhd"], trak_start, trak_end)
+            if tkhd:
+                # Width and height are the last two 16.16 fixed-point fields of tkhd
+                w, h = struct.unpack(">II", moov[tkhd[1] - 8:tkhd[1]])
+                width, height = w >> 16, h >> 16
+
+            mdhd = find_box(moov, [b"mdia", b"mdhd"], trak_start, trak_end)
+            stts = find_box(moov, [b"mdia", b"minf", b"stbl", b"stts"], trak_start, trak_end)
+            if mdhd and stts:
+                timescale, units = read_media_duration(moov, mdhd[0])
+                entry_count = struct.unpack(">I", moov[stts[0] + 4:stts[0] + 8])[0]
+                samples = sum(
+                    struct.unpack(">I", moov[stts[0] + 8 + i * 8:stts[0] + 12 + i * 8])[0]
+                    for i in range(entry_count)
+                )
+                if units and timescale:
+                    fps = samples / (units / timescale)
+
+    return video_info("mp4", duration, fps, width, height, video_codec, audio_codec)
+
+
+# ---- Matroska / WebM (EBML) ----
+
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_SEEKHEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_DEFAULT_DURATION = 0x23E383
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_CLUSTER = 0x1F43B675
+
+
+def read_vint(data, offset, keep_marker=False):
+    """Decode an EBML variable-length integer; returns (value, length, all_ones)."""
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    all_ones = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, all_ones
+
+
+def read_element_header(reader, offset):
+    header = reader.read(offset, 12)
+    element_id, id_length, _ = read_vint(header, 0, keep_marker=True)
+    element_size, size_length, unknown = read_vint(header, id_length)
+    return element_id, offset + id_length + size_length, None if unknown else element_size
+
+
+def iter_elements(data, start=0, end=None):
+    """Yield (id, payload_start, payload_end) for the elements laid out in data[start:end]."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset < end:
+        element_id, id_length, _ = read_vint(data, offset, keep_marker=True)
+        element_size, size_length, unknown = read_vint(data, offset + id_length)
+        payload_start = offset + id_length + size_length
+        payload_end = end if unknown else min(payload_start + element_size, end)
+        yield element_id, payload_start, payload_end
+        offset = payload_end
+
+
+def read_uint(data, start, end):
+    return int.from_bytes(data[start:end], "big")
+
+
+def read_float(data, start, end):
+    return struct.unpack(">f" if end - start == 4 else ">d", data[start:end])[0]
+
+
+def probe_matroska(reader):
+    element_id, header_start, header_size = read_element_header(reader, 0)
+    header = reader.read(header_start, header_size)
+    doc_type = "matroska"
+    for child_id, start, end in iter_elements(header):
+        if child_id == EBML_DOCTYPE:
+            doc_type = header[start:end].decode("ascii", "replace")
+
+    segment_id, segment_start, segment_size = read_element_header(reader, header_start + header_size)
+    if segment_id != MKV_SEGMENT:
+        return None
+    segment_end = reader.size if segment_size is None else min(segment_start + segment_size, reader.size)
+
+    # Collect Info and Tracks from the segment's top level, stopping at the first Cluster;
+    # anything that sits after the clusters is found through the SeekHead instead.
+    found = {}
+    seek_positions = {}
+    offset = segment_start
+    while offset < segment_end and offset - segment_start < MAX_EBML_SCAN:
+        child_id, payload_start, child_size = read_element_header(reader, offset)
+        if child_id == MKV_CLUSTER or child_size is None:
+            break
+        if child_id in (MKV_INFO, MKV_TRACKS, MKV_SEEKHEAD):
+            payload = reader.read(payload_start, child_size)
+            if child_id == MKV_SEEKHEAD:
+                seek_positions.update(read_seek_head(payload))
+            else:
+                found[child_id] = payload
+        if MKV_INFO in found and MKV_TRACKS in found:
+            break
+        offset = payload_start + child_size
+
+    for wanted in (MKV_INFO, MKV_TRACKS):
+        if wanted not in found and wanted in seek_positions:
+            child_id, payload_start, child_size = read_element_header(reader, segment_start + seek_positions[wanted])
+            if child_id == wanted and child_size is not None:
+                found[wanted] = reader.read(payload_start, child_size)
+
+    if MKV_INFO not in found and MKV_TRACKS not in found:
+        return None
+
+    duration = None
+    info = found.get(MKV_INFO, b"")
+    timecode_scale = 1000000
+    raw_duration = None
+    for child_id, start, end in iter_elements(info):
+        if child_id == MKV_TIMECODE_SCALE:
+            timecode_scale = read_uint(info, start, end)
+        elif child_id == MKV_DURATION:
+            raw_duration = read_float(info, start, end)
+    if raw_duration is not None:
+        duration = raw_duration * timecode_scale / 1e9
+
+    fps = width = height = video_codec = audio_codec = None
+    tracks = found.get(MKV_TRACKS, b"")
+    for entry_id, entry_start, entry_end in iter_elements(tracks):
+        if entry_id != MKV_TRACK_ENTRY:
+            continue
+        track = {}
+        for child_id, start, end in iter_elements(tracks, entry_start, entry_end):
+            if child_id == MKV_TRACK_TYPE:
+                track["type"] = read_uint(tracks, start, end)
+            elif child_id == MKV_CODEC_ID:
+                track["codec"] = tracks[start:end].decode("ascii", "replace").rstrip("\x00")
+            elif child_id == MKV_DEFAULT_DURATION:
+                track["default_duration"] = read_uint(tracks, start, end)
+            elif child_id == MKV_VIDEO:
+                for video_id, v_start, v_end in iter_elements(tracks, start, end):
+                    if video_id == MKV_PIXEL_WIDTH:
+                        track["width"] = read_uint(tracks, v_start, v_end)
+                    elif video_id == MKV_PIXEL_HEIGHT:
+                        track["height"] = read_uint(tracks, v_start, v_end)
+
+        if track.get("type") == 1 and video_codec is None:
+            video_codec = track.get("codec")
+            width, height = track.get("width"), track.get("height")
+            if track.get("default_duration"):
+                fps = 1e9 / track["default_duration"]
+        elif track.get("type") == 2 and audio_codec is None:
+            audio_codec = track.get("codec")
+
+    return video_info(doc_type, duration, fps, width, height, video_codec, audio_codec)
+
+
+def read_seek_head(data):
+    positions = {}
+    for seek_id, seek_start, seek_end in iter_elements(data):
+        if seek_id != MKV_SEEK:
+            continue
+        target = position = None
+        for child_id, start, end in iter_elements(data, seek_start, seek_end):
+            if child_id == MKV_SEEK_ID:
+                target = read_uint(data, start, end)
+            elif child_id == MKV_SEEK_POSITION:
+                position = read_uint(data, start, end)
+        if target is not None and position is not None:
+            positions[target] = position
+    return positions
+
+
+# ---- ffprobe fallback ----
+
+# Function to read container info with a single ffprobe call (stream headers only)
+def ffprobe_video(file_path):
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        raise RuntimeError("Unrecognised video container and ffprobe is not installed")
+
+    result = subprocess.run(
+        [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", file_path],
+        capture_output=True, timeout=FFPROBE_TIMEOUT, check=True
+    )
+    probe = json.loads(result.stdout)
+    streams = probe.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    fps = None
+    rate = video.get("avg_frame_rate") or video.get("r_frame_rate")
+    if rate and "/" in rate:
+        num, den = rate.split("/")
+        fps = int(num) / int(den) if int(den) else None
+
+    duration = probe.get("format", {}).get("duration")
+    return video_info(
+        probe.get("format", {}).get("format_name"),
+        float(duration) if duration else None,
+        fps, video.get("width"), video.get("height"),
+        video.get("codec_name"), audio.get("codec_name"),
+    )
@@ -0,0 +1,322 @@
+import os
+import uuid
+import asyncio
+import datetime
+import tempfile
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, or_, and_
+
+from app.core.config import (
+    AWS_S3_BUCKET, S3_UPLOAD_WORKERS,
+    METADATA_JOB_POLL_SECONDS, METADATA_JOB_BATCH_SIZE, METADATA_JOB_MAX_ATTEMPTS, METADATA_JOB_STALE_SECONDS,
+    METADATA_JOB_RECORD_WAIT_HOURS
+)
+from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
+from app.db.pg_models import FileObject, FileVersion, MetadataExtractionJob
+from app.service.metadata_extractor.dispatcher import extract_metadata_async
+from app.service.metadata_extractor.video import probe_video
+from app.service.storage import s3_client, s3_call, run_s3
+from app.service.acl_utils import can_view_file
+
+logger = logging.getLogger(__name__)
+
+# Size of each ranged GET when pulling an object back for metadata extraction
+RANGE_READ_SIZE = 16 * 1024 * 1024  # 16MB
+
+# Video containers are probed from their headers over ranged GETs instead of downloaded
+VIDEO_EXTENSIONS = {".mp4", ".mkv"}
+
+# Longest wait between retries of a failed job, and between checks for missing file rows
+MAX_RETRY_DELAY = 600  # seconds
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+# Function to pull an object into a temp file with concurrent ranged GETs
+async def download_to_tempfile(s3_key: str, version_id: str, size: int, suffix: str) -> str:
+    semaphore = asyncio.Semaphore(S3_UPLOAD_WORKERS)
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    version_args = {"VersionId": version_id} if version_id else {}
+
+    async def fetch_range(start: int):
+        end = min(start + RANGE_READ_SIZE, size) - 1
+        async with semaphore:
+            response = await s3_call(
+                "get_object",
+                Bucket=AWS_S3_BUCKET,
+                Key=s3_key,
+                Range=f"bytes={start}-{end}",
+                **version_args
+            )
+            body = await run_s3(response["Body"].read)
+        # Writes happen on the event loop thread, one at a time, at each range's own offset
+        tmp.seek(start)
+        tmp.write(body)
+
+    try:
+        await asyncio.gather(*[fetch_range(start) for start in range(0, size, RANGE_READ_SIZE)])
+    finally:
+        tmp.close()
+    return tmp.name
+
+
+# Function to read video container info straight from S3 with a few ranged GETs
+# Returns None when the header can't be parsed, so the caller falls back to a full download.
+def probe_s3_video(s3_key: str, version_id: str, size: int, extension: str):
+    version_args = {"VersionId": version_id} if version_id else {}
+
+    def fetch(offset, length):
+        response = s3_client.get_object(
+            Bucket=AWS_S3_BUCKET, Key=s3_key, Range=f"bytes={offset}-{offset + length - 1}", **version_args
+        )
+        return response["Body"].read()
+
+    try:
+        info = probe_video(fetch, size, extension)
+    except Exception:
+        logger.warning("Header probe failed for %s, falling back to download", s3_key, exc_info=True)
+        return None
+    if info is not None:
+        info.update({"extension": extension, "size": size})
+    return info
+
+
+# Function to queue metadata extraction for an uploaded object version
+async def enqueue_metadata_job(s3_key: str, version_id: str, user_id: str = None) -> str:
+    now = _now()
+    job_uid = uuid.uuid4()
+    async with pg_session() as session:
+        session.add(MetadataExtractionJob(
+            uid=job_uid,
+            s3_key=s3_key,
+            version_id=version_id,
+            requested_by_id=uuid.UUID(str(user_id)) if user_id else None,
+            status="pending",
+            attempts=0,
+            last_error="",
+            run_after=now,
+            created_at=now,
+            updated_at=now,
+        ))
+        await session.commit()
+    return str(job_uid)
+
+
+# Function to look up a job's progress by job id or S3 version id
+# Visible to whoever uploaded the file, and to anyone who can view a file recorded for the version.
+async def get_metadata_job_status(job_id: str = None, version_id: str = None, user_id: str = None):
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID required.")
+    if not job_id and not version_id:
+        raise HTTPException(status_code=400, detail="Provide job_id or version_id.")
+
+    query = select(MetadataExtractionJob)
+    if job_id:
+        try:
+            query = query.where(MetadataExtractionJob.uid == uuid.UUID(job_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid job_id.")
+    else:
+        query = query.where(MetadataExtractionJob.version_id == version_id)
+
+    async with pg_session() as session:
+        result = await session.execute(query.order_by(MetadataExtractionJob.created_at.desc()).limit(1))
+        job = result.scalar_one_or_none()
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Metadata job not found.")
+    if not await can_view_job(job, user_id):
+        raise HTTPException(status_code=403, detail="You do not have access to this file.")
+
+    return {
+        "job_id": str(job.uid),
+        "s3_key": job.s3_key,
+        "version_id": job.version_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.last_error or None,
+        "metadata": job.job_metadata if job.status == "done" else None,
+        "updated_at": job.updated_at,
+    }
+
+
+async def can_view_job(job: MetadataExtractionJob, user_id: str) -> bool:
+    if job.requested_by_id and str(job.requested_by_id) == str(user_id):
+        return True
+    if not job.version_id:
+        return False
+
+    async with pg_session() as session:
+        result = await session.execute(
+            select(FileObject).join(FileVersion, FileVersion.file_id == FileObject.uid)
+            .where(FileVersion.s3_version_id == job.version_id)
+        )
+        files = result.scalars().unique().all()
+
+    for file_obj in files:
+        if await can_view_file(user_id, file_obj):
+            return True
+    return False
+
+
+# Function to claim a batch of due jobs
+# FOR UPDATE SKIP LOCKED lets several API processes run workers against the same table;
+# jobs left "running" by a crashed worker become claimable again after METADATA_JOB_STALE_SECONDS.
+async def claim_metadata_jobs(limit: int = METADATA_JOB_BATCH_SIZE):
+    now = _now()
+    stale_before = now - datetime.timedelta(seconds=METADATA_JOB_STALE_SECONDS)
+
+    async with pg_session() as session:
+        async with session.begin():
+            result = await session.execute(
+                select(MetadataExtractionJob)
+                .where(or_(
+                    and_(MetadataExtractionJob.status == "pending", MetadataExtractionJob.run_after <= now),
+                    and_(MetadataExtractionJob.status == "running", MetadataExtractionJob.updated_at < stale_before),
+                ))
+                .order_by(MetadataExtractionJob.run_after)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = result.scalars().all()
+            for job in jobs:
+                job.status = "running"
+                job.attempts += 1
+                job.updated_at = now
+    return jobs
+
+
+def _merge_metadata(extracted: dict, recorded: dict) -> dict:
+    # What was recorded at upload time (real filename, size, s3_key) wins over the temp-file view
+    return {**extracted, **(recorded or {}), "metadata_status": "ready"}
+
+
+# Function to write extracted metadata onto every FileVersion for the object version,
+# and onto FileObject.metadata where that version is still the latest.
+# Returns False when no FileVersion row exists yet (the upload's caller has not recorded it).
+async def apply_extracted_metadata(session, version_id: str, extracted: dict) -> bool:
+    if not version_id:
+        return False
+
+    result = await session.execute(
+        select(FileVersion).where(FileVersion.s3_version_id == version_id).with_for_update()
+    )
+    versions = result.scalars().all()
+    if not versions:
+        return False
+
+    for version in versions:
+        version.metadata_snapshot = _merge_metadata(extracted, version.metadata_snapshot)
+
+    result = await session.execute(
+        select(FileObject).where(
+            FileObject.uid.in_({version.file_id for version in versions}),
+            FileObject.latest_version_id == version_id
+        ).with_for_update()
+    )
+    for file_obj in result.scalars().all():
+        file_obj.file_metadata = _merge_metadata(extracted, file_obj.file_metadata)
+    return True
+
+
+# Function to put a job back in the queue with exponential backoff, or fail it for good
+async def retry_or_fail_job(job: MetadataExtractionJob, error: str, extracted: dict = None):
+    now = _now()
+    values = {MetadataExtractionJob.last_error: error, MetadataExtractionJob.updated_at: now}
+    if extracted is not None:
+        values[MetadataExtractionJob.job_metadata] = extracted
+    if job.attempts >= METADATA_JOB_MAX_ATTEMPTS:
+        values[MetadataExtractionJob.status] = "failed"
+    else:
+        values[MetadataExtractionJob.status] = "pending"
+        values[MetadataExtractionJob.run_after] = now + datetime.timedelta(seconds=min(5 * 2 ** job.attempts, MAX_RETRY_DELAY))
+
+    async with pg_session() as session:
+        await session.execute(update(MetadataExtractionJob).where(MetadataExtractionJob.uid == job.uid).values(values))
+        await session.commit()
+
+
+# Function to park a finished extraction until its file rows exist
+# Waiting is not a failure: the claim's attempt is handed back, and the job only fails once
+# METADATA_JOB_RECORD_WAIT_HOURS have passed since it was queued. Django also applies the
+# stored result itself when it writes the rows (see Upload.record_uploads).
+async def wait_for_file_records(job: MetadataExtractionJob, extracted: dict):
+    now = _now()
+    waited = now - job.created_at
+    values = {
+        MetadataExtractionJob.job_metadata: extracted,
+        MetadataExtractionJob.attempts: MetadataExtractionJob.attempts - 1,
+        MetadataExtractionJob.updated_at: now,
+    }
+    if waited > datetime.timedelta(hours=METADATA_JOB_RECORD_WAIT_HOURS):
+        values[MetadataExtractionJob.status] = "failed"
+        values[MetadataExtractionJob.last_error] = "File records for this version were never written."
+    else:
+        values[MetadataExtractionJob.status] = "pending"
+        values[MetadataExtractionJob.last_error] = ""
+        delay = min(max(waited.total_seconds() / 2, METADATA_JOB_POLL_SECONDS), MAX_RETRY_DELAY)
+        values[MetadataExtractionJob.run_after] = now + datetime.timedelta(seconds=delay)
+
+    async with pg_session() as session:
+        await session.execute(update(MetadataExtractionJob).where(MetadataExtractionJob.uid == job.uid).values(values))
+        await session.commit()
+
+
+# Function to run one job: extract (once) and write the result onto the file rows
+async def process_metadata_job(job: MetadataExtractionJob):
+    try:
+        extracted = job.job_metadata
+        if extracted is None:
+            version_args = {"VersionId": job.version_id} if job.version_id else {}
+            head = await s3_call("head_object", Bucket=AWS_S3_BUCKET, Key=job.s3_key, **version_args)
+            extension = os.path.splitext(job.s3_key)[1].lower()
+            if extension in VIDEO_EXTENSIONS:
+                extracted = await run_s3(probe_s3_video, job.s3_key, job.version_id, head["ContentLength"], extension)
+
+        if extracted is None:
+            tmp_path = await download_to_tempfile(job.s3_key, job.version_id, head["ContentLength"], extension)
+            try:
+                extracted = await extract_metadata_async(tmp_path)
+            finally:
+                os.remove(tmp_path)
+
+        async with pg_session() as session:
+            async with session.begin():
+                applied = await apply_extracted_metadata(session, job.version_id, extracted)
+                if applied:
+                    await session.execute(
+                        update(MetadataExtractionJob).where(MetadataExtractionJob.uid == job.uid).values({
+                            MetadataExtractionJob.status: "done",
+                            MetadataExtractionJob.job_metadata: extracted,
+                            MetadataExtractionJob.last_error: "",
+                            MetadataExtractionJob.updated_at: _now(),
+                        })
+                    )
+
+        if not applied:
+            # Keep the extracted result so the next run only has to write it
+            await wait_for_file_records(job, extracted)
+
+    except Exception as e:
+        logger.exception("Metadata job %s failed", job.uid)
+        await retry_or_fail_job(job, str(e))
+
+
+# Function to run the extraction worker forever; started once when the app boots
+# CPU-bound work happens in the extraction process pool, so jobs in a batch run concurrently.
+async def run_metadata_worker():
+    while True:
+        try:
+            jobs = await claim_metadata_jobs()
+        except Exception:
+            logger.exception("Could not claim metadata jobs")
+            jobs = []
+
+        if jobs:
+            await asyncio.gather(*[process_metadata_job(job) for job in jobs])
+        else:
+            await asyncio.sleep(METADATA_JOB_POLL_SECONDS)
@@ -1,40 +1,87 @@
-import os
-import boto3
+import uuid
 from pathlib import Path
 from fastapi import HTTPException
 from botocore.exceptions import BotoCoreError, ClientError
-from app.service.file_service import get_folder_by_extension
-from app.core.config import AWS_S3_BUCKET, AWS_REGION
+from sqlalchemy import select
+from app.service.file_service import get_folder_by_extension, choose_part_size, ALLOWED_EXTENSIONS, MAX_PARTS
+from app.service.storage import s3_client, s3_call
+from app.service.acl_utils import can_edit_folder
+from app.service.upload_sessions import create_upload_session, mark_upload_session, get_upload_session
+from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
+from app.db.pg_models import FileObject
+from app.core.config import AWS_S3_BUCKET, S3_UPLOAD_FOLDER
 
-s3_client = boto3.client("s3", region_name=AWS_REGION)
+PART_URL_EXPIRY = 900  # 15 minutes
+MAX_PARTS_PER_PRESIGN = 1000
 
-S3_UPLOAD_FOLDER = "uploads/"
 
+async def initiate_presigned_multipart_upload(filename: str, content_type: str, user_id: str = None, parent_id: str = None, file_size: int = None):
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID required to upload.")
 
-def initiate_presigned_multipart_upload(filename: str, content_type: str):
-    try:
-        extension = Path(filename).suffix.lower()
-        if not extension:
-            raise HTTPException(status_code=400, detail="Filename must have an extension.")
+    extension = Path(filename).suffix.lower()
+    if not extension:
+        raise HTTPException(status_code=400, detail="Filename must have an extension.")
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {extension}")
+
+    # Check the target folder now; finalize trusts what is recorded on the upload
+    if parent_id:
+        async with pg_session() as session:
+            result = await session.execute(
+                select(FileObject).where(
+                    FileObject.uid == uuid.UUID(parent_id),
+                    FileObject.type == "folder",
+                    FileObject.trashed_at.is_(None)
+                )
+            )
+            parent = result.scalar_one_or_none()
+        if parent is None:
+            raise HTTPException(status_code=404, detail="Target folder not found.")
+        if not await can_edit_folder(user_id, parent):
+            raise HTTPException(status_code=403, detail="You don't have editor access to this folder.")
 
+    try:
         folder = get_folder_by_extension(extension)
         s3_key = f"{S3_UPLOAD_FOLDER}{folder}/{filename}"
 
-        response = s3_client.create_multipart_upload(
+        response = await s3_call(
+            "create_multipart_upload",
             Bucket=AWS_S3_BUCKET,
             Key=s3_key,
-            ContentType=content_type
+            ContentType=content_type,
+            # Carried onto the finished object so finalize knows who uploaded it and where it goes
+            Metadata={"uploaded-by": str(user_id), "parent-id": parent_id or ""}
         )
 
-        return {
-            "upload_id": response["UploadId"],
-            "key": s3_key,
-            "message": "Multipart upload initiated. Use the UploadId and key to upload parts."
-        }
-
     except (BotoCoreError, ClientError) as e:
         raise HTTPException(status_code=500, detail=f"Failed to initiate multipart upload: {str(e)}")
 
+    result = {
+        "upload_id": response["UploadId"],
+        "key": s3_key,
+        "message": "Multipart upload initiated. Use the UploadId and key to upload parts."
+    }
+    if file_size:
+        result.update(get_part_layout(file_size))
+
+    await create_upload_session(
+        response["UploadId"], s3_key, content_type, user_id, parent_id,
+        size=file_size, part_size=result.get("part_size"), source="direct"
+    )
+    return result
+
+
+# Function to check that an in-progress upload belongs to the caller and matches the key
+# Every call that takes a bare key/upload_id goes through this first.
+async def authorize_upload(key: str, upload_id: str, user_id: str = None):
+    upload = await get_upload_session(upload_id, user_id)
+    if upload.s3_key != key:
+        raise HTTPException(status_code=400, detail="Key does not match this upload.")
+    if upload.status != "in_progress":
+        raise HTTPException(status_code=409, detail=f"Upload is {upload.status}.")
+    return upload
+
 
 def get_presigned_part_url(key: str, upload_id: str, part_number: int):
     try:
@@ -46,25 +93,120 @@ def get_presigned_part_url(key: str, upload_id: str, part_number: int):
                 "UploadId": upload_id,
                 "PartNumber": part_number
             },
-            ExpiresIn=900 # 15 minutes
+            ExpiresIn=PART_URL_EXPIRY
         )
     except (BotoCoreError, ClientError) as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate part URL: {str(e)}")
 
 
-def complete_presigned_multipart_upload(key: str, upload_id: str, parts: list):
+# Function to work out part size and count from the declared file size
+# Uses the same sizing as server-side uploads so both paths split files the same way.
+def get_part_layout(file_size: int):
+    part_size = choose_part_size(file_size)
+    return {
+        "part_size": part_size,
+        "part_count": max(1, -(-file_size // part_size)),
+    }
+
+
+# Function to presign a range of part URLs in one call (signing is local, no S3 round trip)
+# With file_size, the part size is chosen adaptively, last_part defaults to the final part,
+# and every entry carries the byte range the client should send for it.
+def get_presigned_part_urls(key: str, upload_id: str, first_part: int = 1, last_part: int = None, file_size: int = None):
+    layout = get_part_layout(file_size) if file_size else None
+    if last_part is None:
+        if layout is None:
+            raise HTTPException(status_code=400, detail="Provide last_part or file_size.")
+        last_part = layout["part_count"]
+
+    if first_part < 1 or last_part > MAX_PARTS or first_part > last_part:
+        raise HTTPException(status_code=400, detail=f"Part numbers must satisfy 1 <= first_part <= last_part <= {MAX_PARTS}.")
+    if last_part - first_part + 1 > MAX_PARTS_PER_PRESIGN:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PARTS_PER_PRESIGN} parts can be presigned per call.")
+
+    parts = []
+    for part_number in range(first_part, last_part + 1):
+        part = {"part_number": part_number, "url": get_presigned_part_url(key, upload_id, part_number)}
+        if layout:
+            start = (part_number - 1) * layout["part_size"]
+            part["range"] = [start, min(start + layout["part_size"], file_size) - 1]
+        parts.append(part)
+
+    result = {"parts": parts, "expires_in": PART_URL_EXPIRY}
+    if layout:
+        result.update(layout)
+    return result
+
+
+# Function to list the parts S3 already holds, so an interrupted client can skip them
+async def list_uploaded_parts(key: str, upload_id: str):
+    parts = []
+    kwargs = {"Bucket": AWS_S3_BUCKET, "Key": key, "UploadId": upload_id}
+    try:
+        while True:
+            response = await s3_call("list_parts", **kwargs)
+            for part in response.get("Parts", []):
+                parts.append({
+                    "part_number": part["PartNumber"],
+                    "etag": part["ETag"],
+                    "size": part["Size"],
+                })
+            if not response.get("IsTruncated"):
+                break
+            kwargs["PartNumberMarker"] = response["NextPartNumberMarker"]
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+            raise HTTPException(status_code=404, detail="Upload not found or already completed/aborted.")
+        raise HTTPException(status_code=500, detail=f"Failed to list parts: {str(e)}")
+
+    return {"key": key, "upload_id": upload_id, "parts": parts}
+
+
+# Function to tell an interrupted client where to pick up again
+# Combines the recorded session with what S3 actually holds, so the client gets the
+# part layout back and only has to send the parts listed as missing.
+async def get_resume_state(upload_id: str, user_id: str = None):
+    upload = await get_upload_session(upload_id, user_id)
+    if upload.status != "in_progress":
+        raise HTTPException(status_code=409, detail=f"Upload is {upload.status} and cannot be resumed.")
+
+    listed = await list_uploaded_parts(upload.s3_key, upload_id)
+    await mark_upload_session(upload_id, parts_done=len(listed["parts"]))
+
+    result = {
+        "upload_id": upload_id,
+        "key": upload.s3_key,
+        "filename": upload.filename,
+        "size": upload.size,
+        "parts": listed["parts"],
+        "parts_done": len(listed["parts"]),
+        "expires_at": upload.expires_at,
+    }
+    if upload.size:
+        layout = get_part_layout(upload.size)
+        done = {part["part_number"] for part in listed["parts"]}
+        result.update(layout)
+        result["missing_parts"] = [n for n in range(1, layout["part_count"] + 1) if n not in done]
+    return result
+
+
+async def complete_presigned_multipart_upload(key: str, upload_id: str, parts: list):
     try:
-        response = s3_client.complete_multipart_upload(
+        response = await s3_call(
+            "complete_multipart_upload",
             Bucket=AWS_S3_BUCKET,
             Key=key,
             UploadId=upload_id,
             MultipartUpload={"Parts": parts}
         )
 
-        return {
-            "message": "Multipart upload completed successfully!",
-            "location": response.get("Location"),
-            "key": key
-        }
     except (BotoCoreError, ClientError) as e:
         raise HTTPException(status_code=500, detail=f"Failed to complete multipart upload: {str(e)}")
+
+    await mark_upload_session(upload_id, status="completed", parts_done=len(parts))
+    return {
+        "message": "Multipart upload completed successfully!",
+        "location": response.get("Location"),
+        "key": key,
+        "version_id": response.get("VersionId")
+    }
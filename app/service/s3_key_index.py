@@ -0,0 +1,63 @@
+import datetime
+import uuid
+from typing import Optional, Dict
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
+from app.db.pg_models import S3KeyIndex
+
+
+# Function to look up the S3 key for a filename
+# The table is the only cache: every API process reads the same rows, so no worker can hold a stale key.
+async def lookup_s3_key(filename: str) -> Optional[str]:
+    async with pg_session() as session:
+        result = await session.execute(
+            select(S3KeyIndex.s3_key).where(S3KeyIndex.filename == filename)
+        )
+        s3_key = result.scalar_one_or_none()
+    return s3_key
+
+
+# Function to look up the S3 keys for many filenames with a single IN query
+async def lookup_s3_keys(filenames) -> Dict[str, str]:
+    filenames = set(filenames)
+    if not filenames:
+        return {}
+
+    async with pg_session() as session:
+        result = await session.execute(
+            select(S3KeyIndex.filename, S3KeyIndex.s3_key).where(S3KeyIndex.filename.in_(filenames))
+        )
+        return dict(result.all())
+
+
+# Function to insert or update the S3 key recorded for a filename
+async def record_s3_key(filename: str, s3_key: str):
+    await record_s3_keys({filename: s3_key})
+
+
+# Function to upsert many filename -> S3 key entries in one statement
+async def record_s3_keys(keys: Dict[str, str]):
+    if not keys:
+        return
+    now = datetime.datetime.now(datetime.timezone.utc)
+    stmt = insert(S3KeyIndex).values([
+        {"uid": uuid.uuid4(), "filename": filename, "s3_key": s3_key, "updated_at": now}
+        for filename, s3_key in keys.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[S3KeyIndex.filename],
+        set_={"s3_key": stmt.excluded.s3_key, "updated_at": stmt.excluded.updated_at},
+    )
+    async with pg_session() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+# Function to drop a filename from the index once its S3 key no longer exists
+async def forget_s3_key(filename: str):
+    async with pg_session() as session:
+        await session.execute(delete(S3KeyIndex).where(S3KeyIndex.filename == filename))
+        await session.commit()
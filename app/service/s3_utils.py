@@ -1,24 +1,11 @@
-import os
-import boto3
 import mimetypes
-from botocore.config import Config
 from fastapi import HTTPException, UploadFile
 from pathlib import Path
 from .file_service import get_folder_by_extension
+from .storage import s3_client
 
 from ..core.config import S3_UPLOAD_FOLDER, AWS_S3_BUCKET
 
-AWS_REGION = "eu-north-1"
-AWS_BUCKET = os.getenv("AWS_S3_BUCKET")
-
-s3_client = boto3.client(
-    "s3",
-    region_name=AWS_REGION,
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    config=Config(signature_version="s3v4")
-)
-
 def generate_presigned_upload_url(file: UploadFile, expires_in: int = 900):
     try:
         filename = file.filename
@@ -34,6 +21,7 @@ def generate_presigned_upload_url(file: UploadFile, expires_in: int = 900):
         folder = get_folder_by_extension(extension)
         s3_key = f"{S3_UPLOAD_FOLDER}{folder}/{filename}"
 
+        # Presigning is a local signature computation, no network round trip
         presigned_url = s3_client.generate_presigned_url(
             "put_object",
             Params={
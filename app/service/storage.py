@@ -0,0 +1,41 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+from app.core.config import (
+    AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY,
+    S3_MAX_POOL_CONNECTIONS, S3_EXECUTOR_WORKERS,
+)
+
+# Shared S3 client for every FastAPI service (boto3 clients are thread-safe)
+s3_client = boto3.client(
+    "s3",
+    region_name=AWS_REGION or "eu-north-1",
+    aws_access_key_id=AWS_ACCESS_KEY_ID,
+    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    use_ssl=True,
+    config=Config(
+        signature_version="s3v4",
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={"max_attempts": 3, "mode": "standard"},
+    ),
+)
+
+# Dedicated, bounded pool for blocking boto3 calls so they never run on the event loop
+# and never compete with FastAPI's default threadpool.
+s3_executor = ThreadPoolExecutor(max_workers=S3_EXECUTOR_WORKERS, thread_name_prefix="s3")
+
+
+# Function to run any blocking S3-related callable on the S3 executor
+async def run_s3(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(s3_executor, functools.partial(func, *args, **kwargs))
+
+
+# Function to call an S3 client operation by name without blocking the event loop
+async def s3_call(operation: str, **kwargs):
+    return await run_s3(getattr(s3_client, operation), **kwargs)
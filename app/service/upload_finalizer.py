@@ -0,0 +1,114 @@
+import os
+import uuid
+import datetime
+import logging
+
+from sqlalchemy import select
+
+from app.core.config import AWS_S3_BUCKET, S3_UPLOAD_FOLDER, CDN_DOMAIN
+from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
+from app.db.pg_models import FileObject, FileVersion
+from app.service.metadata_jobs import enqueue_metadata_job
+from app.service.s3_key_index import record_s3_key
+from app.service.storage import s3_call
+
+logger = logging.getLogger(__name__)
+
+
+# Function to record a finished direct upload: write FileObject/FileVersion and queue extraction
+# Runs as a background task after the multipart upload completes, so the client never waits on it.
+async def finalize_direct_upload(s3_key: str, version_id: str):
+    head = await s3_call("head_object", Bucket=AWS_S3_BUCKET, Key=s3_key, VersionId=version_id)
+    uploaded_by = uuid.UUID(head["Metadata"]["uploaded-by"])
+    parent_id = head["Metadata"].get("parent-id") or None
+
+    filename = s3_key.rsplit("/", 1)[-1]
+    extension = os.path.splitext(filename)[1].lower()
+    size = head["ContentLength"]
+
+    await record_s3_key(filename, s3_key)
+
+    cdn_relative_path = s3_key.replace(f"{S3_UPLOAD_FOLDER}", "")
+    metadata = {
+        "filename": filename,
+        "extension": extension,
+        "content_type": head.get("ContentType", "application/octet-stream"),
+        "size": size,
+        "s3_key": s3_key,
+        "metadata_status": "pending",
+    }
+    cdn_url = f"https://{CDN_DOMAIN}/{cdn_relative_path}"
+
+    file_uid = await save_direct_upload_records(filename, extension, size, cdn_url, version_id, metadata, uploaded_by, parent_id)
+    # Queued after the rows exist, so the worker can apply the result on its first run
+    await enqueue_metadata_job(s3_key, version_id, uploaded_by)
+    logger.info("Finalized direct upload %s as file %s", s3_key, file_uid)
+    return file_uid
+
+
+# Function to create or version the FileObject for a direct upload, mirroring Django's upload view
+async def save_direct_upload_records(filename, extension, size, cdn_url, version_id, metadata, uploaded_by, parent_id):
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    async with pg_session() as session:
+        async with session.begin():
+            parent = await session.get(FileObject, uuid.UUID(parent_id)) if parent_id else None
+            owner_id = parent.owner_id if parent else uploaded_by
+            parent_condition = FileObject.parent_id == parent.uid if parent else FileObject.parent_id.is_(None)
+
+            result = await session.execute(
+                select(FileObject).where(
+                    FileObject.owner_id == owner_id,
+                    parent_condition,
+                    FileObject.name == filename,
+                    FileObject.type == "file"
+                ).order_by(FileObject.created_at).limit(1)
+            )
+            file_obj = result.scalar_one_or_none()
+
+            if file_obj is None:
+                file_uid = uuid.uuid4()
+                file_obj = FileObject(
+                    uid=file_uid,
+                    owner_id=owner_id,
+                    parent_id=parent.uid if parent else None,
+                    name=filename,
+                    type="file",
+                    created_at=now,
+                    path=f"{parent.path if parent else '/'}{file_uid}/",
+                )
+                session.add(file_obj)
+                version_number = 1
+                initial_filename = filename
+            else:
+                result = await session.execute(
+                    select(FileVersion.version_number, FileVersion.initial_filename_snapshot)
+                    .where(FileVersion.file_id == file_obj.uid)
+                    .order_by(FileVersion.version_number.desc())
+                    .limit(1)
+                )
+                latest = result.first()
+                version_number = latest.version_number + 1 if latest else 2
+                initial_filename = (latest.initial_filename_snapshot if latest else None) or file_obj.name
+
+            file_obj.extension = extension.lstrip(".")
+            file_obj.size = size
+            file_obj.uploaded_url = cdn_url
+            file_obj.latest_version_id = version_id
+            file_obj.file_metadata = metadata
+            file_obj.modified_at = now
+            file_obj.accessed_at = now
+            await session.flush()
+
+            session.add(FileVersion(
+                file_id=file_obj.uid,
+                version_number=version_number,
+                action="upload",
+                metadata_snapshot=metadata,
+                s3_version_id=version_id,
+                created_at=now,
+                created_by_id=uploaded_by,
+                initial_filename_snapshot=initial_filename,
+            ))
+
+    return file_obj.uid
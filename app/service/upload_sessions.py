@@ -0,0 +1,184 @@
+import uuid
+import asyncio
+import datetime
+import logging
+
+from fastapi import HTTPException
+from botocore.exceptions import BotoCoreError, ClientError
+from sqlalchemy import select, update
+
+from app.core.config import (
+    AWS_S3_BUCKET, S3_UPLOAD_WORKERS,
+    UPLOAD_SESSION_TTL_HOURS, UPLOAD_REAPER_INTERVAL_SECONDS, UPLOAD_REAPER_BATCH_SIZE
+)
+from app.db.pg_database import AsyncPostgresSessionLocal as pg_session
+from app.db.pg_models import UploadSession
+from app.service.storage import s3_call
+
+logger = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _expiry(now):
+    return now + datetime.timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+
+
+# Function to record a newly created multipart upload
+async def create_upload_session(upload_id: str, s3_key: str, content_type: str, user_id: str = None, parent_id: str = None,
+                                size: int = None, part_size: int = None, source: str = "direct"):
+    now = _now()
+    async with pg_session() as session:
+        session.add(UploadSession(
+            upload_id=upload_id,
+            s3_key=s3_key,
+            filename=s3_key.rsplit("/", 1)[-1],
+            content_type=content_type or "",
+            size=size,
+            part_size=part_size,
+            parts_done=0,
+            status="in_progress",
+            source=source,
+            uploaded_by_id=uuid.UUID(str(user_id)) if user_id else None,
+            parent_id=uuid.UUID(str(parent_id)) if parent_id else None,
+            created_at=now,
+            updated_at=now,
+            expires_at=_expiry(now),
+        ))
+        await session.commit()
+
+
+# Function to update a session's progress or status
+# Any activity on an in-progress session pushes its expiry back, so only idle uploads get reaped.
+async def mark_upload_session(upload_id: str, status: str = None, parts_done: int = None):
+    now = _now()
+    values = {"updated_at": now}
+    if status:
+        values["status"] = status
+    if status in (None, "in_progress"):
+        values["expires_at"] = _expiry(now)
+    if parts_done is not None:
+        values["parts_done"] = parts_done
+
+    async with pg_session() as session:
+        await session.execute(update(UploadSession).where(UploadSession.upload_id == upload_id).values(**values))
+        await session.commit()
+
+
+# Function to load a session, checking it belongs to the caller
+# Server-side sessions have no uploader and are never handed out through the API.
+async def get_upload_session(upload_id: str, user_id: str = None) -> UploadSession:
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID required.")
+
+    async with pg_session() as session:
+        result = await session.execute(select(UploadSession).where(UploadSession.upload_id == upload_id))
+        upload = result.scalar_one_or_none()
+
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload session not found.")
+    if upload.uploaded_by_id is None or str(upload.uploaded_by_id) != str(user_id):
+        raise HTTPException(status_code=403, detail="This upload belongs to another user.")
+    return upload
+
+
+# Function to find when S3 last received a part for an upload, or None if it holds none
+async def last_part_activity(upload: UploadSession):
+    latest = None
+    kwargs = {"Bucket": AWS_S3_BUCKET, "Key": upload.s3_key, "UploadId": upload.upload_id}
+    while True:
+        response = await s3_call("list_parts", **kwargs)
+        for part in response.get("Parts", []):
+            if latest is None or part["LastModified"] > latest:
+                latest = part["LastModified"]
+        if not response.get("IsTruncated"):
+            return latest
+        kwargs["PartNumberMarker"] = response["NextPartNumberMarker"]
+
+
+# Function to abort one batch of expired sessions
+# Rows are claimed with FOR UPDATE SKIP LOCKED so several workers can sweep at once
+# without aborting the same upload twice. A session whose last part landed within the TTL
+# is still being uploaded (clients may presign every part up front), so it is extended
+# instead. Returns (claimed, aborted).
+async def reap_stale_sessions(batch_size: int = UPLOAD_REAPER_BATCH_SIZE):
+    now = _now()
+    active_since = now - datetime.timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+    semaphore = asyncio.Semaphore(S3_UPLOAD_WORKERS)
+
+    async def reap(upload: UploadSession) -> str:
+        async with semaphore:
+            try:
+                last_activity = await last_part_activity(upload)
+                if last_activity is not None and last_activity > active_since:
+                    return "active"
+                await s3_call("abort_multipart_upload", Bucket=AWS_S3_BUCKET, Key=upload.s3_key, UploadId=upload.upload_id)
+            except ClientError as e:
+                # Already completed or aborted on the S3 side: nothing left to clean up
+                if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                    logger.warning("Could not abort upload %s: %s", upload.upload_id, e)
+                    return "failed"
+            except BotoCoreError as e:
+                logger.warning("Could not abort upload %s: %s", upload.upload_id, e)
+                return "failed"
+        return "aborted"
+
+    async with pg_session() as session:
+        async with session.begin():
+            result = await session.execute(
+                select(UploadSession)
+                .where(UploadSession.status == "in_progress", UploadSession.expires_at < now)
+                .order_by(UploadSession.expires_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            uploads = result.scalars().all()
+            if not uploads:
+                return 0, 0
+
+            outcomes = await asyncio.gather(*[reap(upload) for upload in uploads])
+            by_outcome = {"aborted": [], "active": [], "failed": []}
+            for upload, outcome in zip(uploads, outcomes):
+                by_outcome[outcome].append(upload.uid)
+
+            if by_outcome["aborted"]:
+                await session.execute(
+                    update(UploadSession).where(UploadSession.uid.in_(by_outcome["aborted"])).values(status="aborted", updated_at=now)
+                )
+            if by_outcome["active"]:
+                await session.execute(
+                    update(UploadSession).where(UploadSession.uid.in_(by_outcome["active"])).values(expires_at=_expiry(now), updated_at=now)
+                )
+            if by_outcome["failed"]:
+                # Retry on the next sweep rather than spinning on them in this one
+                await session.execute(
+                    update(UploadSession).where(UploadSession.uid.in_(by_outcome["failed"])).values(
+                        expires_at=now + datetime.timedelta(seconds=UPLOAD_REAPER_INTERVAL_SECONDS)
+                    )
+                )
+
+    return len(uploads), len(by_outcome["aborted"])
+
+
+# Function to sweep every expired session, one batch at a time
+async def reap_all_stale_sessions():
+    total = 0
+    while True:
+        claimed, aborted = await reap_stale_sessions()
+        total += aborted
+        if claimed < UPLOAD_REAPER_BATCH_SIZE:
+            return total
+
+
+# Function to run the reaper forever; started once when the app boots
+async def run_upload_reaper():
+    while True:
+        try:
+            aborted = await reap_all_stale_sessions()
+            if aborted:
+                logger.info("Aborted %d stale multipart uploads", aborted)
+        except Exception:
+            logger.exception("Upload reaper sweep failed")
+        await asyncio.sleep(UPLOAD_REAPER_INTERVAL_SECONDS)
@@ -0,0 +1,80 @@
+import asyncio
+
+import boto3
+import pytest
+from fastapi import HTTPException
+from moto import mock_aws
+
+from app.core.config import AWS_S3_BUCKET, AWS_REGION
+from app.service import file_service, storage
+
+S3_KEY = "uploads/report.txt"
+BODY = b"0123456789abcdefghij"
+
+
+@pytest.fixture
+def s3_object(monkeypatch):
+    with mock_aws():
+        client = boto3.client("s3", region_name=AWS_REGION)
+        client.create_bucket(Bucket=AWS_S3_BUCKET)
+        client.put_object(Bucket=AWS_S3_BUCKET, Key=S3_KEY, Body=BODY, ContentType="text/plain")
+        monkeypatch.setattr(storage, "s3_client", client)
+
+        # The database side (file lookup, ACL, key index) is out of scope here
+        async def find_s3_key(filename):
+            return S3_KEY
+
+        async def get_file_id(filename, user_id):
+            return "file-id"
+
+        async def get_permission(file_id, user_id):
+            return "owner"
+
+        monkeypatch.setattr(file_service, "find_s3_key", find_s3_key)
+        monkeypatch.setattr(file_service, "get_file_id_by_filename_and_user", get_file_id)
+        monkeypatch.setattr(file_service, "get_user_permission", get_permission)
+        yield client
+
+
+def download(**kwargs):
+    async def run():
+        response = await file_service.get_file_response("report.txt", "user-id", **kwargs)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return response, body
+    return asyncio.run(run())
+
+
+def test_full_download_is_200(s3_object):
+    response, body = download()
+    assert response.status_code == 200
+    assert body == BODY
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "content-range" not in response.headers
+
+
+def test_range_request_is_206_with_content_range(s3_object):
+    response, body = download(range_header="bytes=5-9")
+    assert response.status_code == 206
+    assert body == BODY[5:10]
+    assert response.headers["content-range"] == f"bytes 5-9/{len(BODY)}"
+    assert response.headers["content-length"] == "5"
+
+
+def test_unsatisfiable_range_is_416(s3_object):
+    with pytest.raises(HTTPException) as excinfo:
+        download(range_header=f"bytes={len(BODY) + 10}-{len(BODY) + 20}")
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers["Content-Range"].startswith("bytes */")
+
+
+def test_stale_if_range_sends_the_full_object(s3_object):
+    response, body = download(range_header="bytes=5-9", if_range='"not-the-current-etag"')
+    assert response.status_code == 200
+    assert body == BODY
+
+
+def test_matching_if_range_keeps_the_range(s3_object):
+    etag = s3_object.head_object(Bucket=AWS_S3_BUCKET, Key=S3_KEY)["ETag"]
+    response, body = download(range_header="bytes=0-3", if_range=etag)
+    assert response.status_code == 206
+    assert body == BODY[:4]
@@ -0,0 +1,39 @@
+import math
+
+import pytest
+
+from app.service.file_service import (
+    choose_part_size, MIN_PART_SIZE, CHUNK_SIZE, MAX_PART_SIZE, MAX_PARTS
+)
+
+MIB = 1024 * 1024
+GIB = 1024 * MIB
+
+
+@pytest.mark.parametrize("file_size", [0, 1, 5 * MIB, 100 * MIB, 512 * MIB])
+def test_small_files_use_the_minimum_part_size(file_size):
+    assert choose_part_size(file_size) == MIN_PART_SIZE
+
+
+@pytest.mark.parametrize("file_size", [1 * GIB, 6 * GIB, 100 * GIB, 900 * GIB])
+def test_part_size_stays_within_bounds_below_the_part_limit(file_size):
+    part_size = choose_part_size(file_size)
+    assert MIN_PART_SIZE <= part_size <= CHUNK_SIZE
+    assert math.ceil(file_size / part_size) <= MAX_PARTS
+
+
+def test_part_size_grows_past_chunk_size_to_respect_the_part_limit():
+    # 100MB parts would need more than 10,000 of them
+    file_size = 2 * 1024 * GIB
+    part_size = choose_part_size(file_size)
+    assert part_size > CHUNK_SIZE
+    assert math.ceil(file_size / part_size) <= MAX_PARTS
+
+
+@pytest.mark.parametrize("file_size", [1, 123 * MIB + 7, 10 * GIB + 1, 3 * 1024 * GIB])
+def test_part_size_is_a_whole_number_of_mebibytes(file_size):
+    assert choose_part_size(file_size) % MIB == 0
+
+
+def test_part_size_never_exceeds_the_s3_maximum():
+    assert choose_part_size(5 * 1024 * 1024 * GIB) == MAX_PART_SIZE